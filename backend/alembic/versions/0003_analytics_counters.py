@@ -0,0 +1,150 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'survey_counters',
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('response_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    op.create_table(
+        'question_counters',
+        sa.Column(
+            'question_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('questions.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('value_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('value_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('value_sq_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('text_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_question_counters_survey_id', 'question_counters', ['survey_id'])
+
+    op.create_table(
+        'option_counters',
+        sa.Column(
+            'option_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('options.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column(
+            'question_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('questions.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_option_counters_question_id', 'option_counters', ['question_id'])
+    op.create_index('ix_option_counters_survey_id', 'option_counters', ['survey_id'])
+
+    op.create_table(
+        'scale_bucket_counters',
+        sa.Column(
+            'question_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('questions.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('value', sa.Float(), primary_key=True, nullable=False),
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_scale_bucket_counters_survey_id', 'scale_bucket_counters', ['survey_id'])
+
+    op.execute(
+        """
+        INSERT INTO survey_counters (survey_id, response_count)
+        SELECT survey_id, count(*)
+        FROM responses
+        GROUP BY survey_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO question_counters (question_id, survey_id, value_count, value_sum, value_sq_sum, text_count)
+        SELECT av.question_id,
+               q.survey_id,
+               count(av.value_number),
+               coalesce(sum(av.value_number), 0),
+               coalesce(sum(av.value_number * av.value_number), 0),
+               count(av.value_text)
+        FROM answer_values av
+        JOIN questions q ON q.id = av.question_id
+        GROUP BY av.question_id, q.survey_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO option_counters (option_id, question_id, survey_id, count)
+        SELECT o.id, o.question_id, q.survey_id, count(*)
+        FROM answer_options ao
+        JOIN options o ON o.id = ao.option_id
+        JOIN questions q ON q.id = o.question_id
+        GROUP BY o.id, o.question_id, q.survey_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO scale_bucket_counters (question_id, value, survey_id, count)
+        SELECT av.question_id, av.value_number, q.survey_id, count(*)
+        FROM answer_values av
+        JOIN questions q ON q.id = av.question_id
+        WHERE av.value_number IS NOT NULL
+        GROUP BY av.question_id, av.value_number, q.survey_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scale_bucket_counters_survey_id', table_name='scale_bucket_counters')
+    op.drop_table('scale_bucket_counters')
+
+    op.drop_index('ix_option_counters_survey_id', table_name='option_counters')
+    op.drop_index('ix_option_counters_question_id', table_name='option_counters')
+    op.drop_table('option_counters')
+
+    op.drop_index('ix_question_counters_survey_id', table_name='question_counters')
+    op.drop_table('question_counters')
+
+    op.drop_table('survey_counters')
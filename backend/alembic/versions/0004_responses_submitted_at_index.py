@@ -0,0 +1,21 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_responses_survey_id_submitted_at_id',
+        'responses',
+        ['survey_id', 'submitted_at', 'id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_responses_survey_id_submitted_at_id', table_name='responses')
@@ -0,0 +1,98 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+granularity = postgresql.ENUM('minute', 'hour', 'day', name='rollupgranularity', create_type=False)
+
+
+def upgrade() -> None:
+    granularity.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'response_rollups',
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('granularity', granularity, primary_key=True, nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), primary_key=True, nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    op.create_table(
+        'option_rollups',
+        sa.Column(
+            'option_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('options.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('granularity', granularity, primary_key=True, nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), primary_key=True, nullable=False),
+        sa.Column(
+            'question_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('questions.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_option_rollups_survey_id', 'option_rollups', ['survey_id'])
+    op.create_index(
+        'ix_option_rollups_question_id_granularity_bucket_start',
+        'option_rollups',
+        ['question_id', 'granularity', 'bucket_start'],
+    )
+
+    op.execute(
+        """
+        INSERT INTO response_rollups (survey_id, granularity, bucket_start, count)
+        SELECT r.survey_id, g.granularity::rollupgranularity, date_trunc(g.granularity, r.submitted_at, 'UTC'), count(*)
+        FROM responses r
+        CROSS JOIN unnest(ARRAY['minute', 'hour', 'day']) AS g(granularity)
+        GROUP BY 1, 2, 3
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO option_rollups (option_id, granularity, bucket_start, question_id, survey_id, count)
+        SELECT ao.option_id,
+               g.granularity::rollupgranularity,
+               date_trunc(g.granularity, r.submitted_at, 'UTC'),
+               av.question_id,
+               r.survey_id,
+               count(*)
+        FROM answer_options ao
+        JOIN answer_values av ON av.id = ao.answer_value_id
+        JOIN responses r ON r.id = av.response_id
+        CROSS JOIN unnest(ARRAY['minute', 'hour', 'day']) AS g(granularity)
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_option_rollups_question_id_granularity_bucket_start', table_name='option_rollups')
+    op.drop_index('ix_option_rollups_survey_id', table_name='option_rollups')
+    op.drop_table('option_rollups')
+    op.drop_table('response_rollups')
+    op.execute('DROP TYPE IF EXISTS "rollupgranularity"')
@@ -0,0 +1,60 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates that slipped past the old SELECT-then-INSERT check are kept:
+    # only the later responses lose their respondent key, so the unique indexes
+    # can be built. The original key stays in meta for a manual review.
+    op.execute(
+        """
+        UPDATE responses r
+        SET meta = coalesce(r.meta, '{}'::jsonb) || jsonb_build_object('duplicate_user_id', r.user_id::text),
+            user_id = NULL
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY survey_id, user_id ORDER BY submitted_at, id) AS rn
+            FROM responses WHERE user_id IS NOT NULL
+        ) d
+        WHERE d.id = r.id AND d.rn > 1
+        """
+    )
+    op.execute(
+        """
+        UPDATE responses r
+        SET meta = coalesce(r.meta, '{}'::jsonb) || jsonb_build_object('duplicate_session_id', r.session_id),
+            session_id = NULL
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY survey_id, session_id ORDER BY submitted_at, id) AS rn
+            FROM responses WHERE session_id IS NOT NULL
+        ) d
+        WHERE d.id = r.id AND d.rn > 1
+        """
+    )
+
+    op.create_index(
+        'uq_responses_survey_id_user_id',
+        'responses',
+        ['survey_id', 'user_id'],
+        unique=True,
+        postgresql_where=sa.text('user_id IS NOT NULL'),
+    )
+    op.create_index(
+        'uq_responses_survey_id_session_id',
+        'responses',
+        ['survey_id', 'session_id'],
+        unique=True,
+        postgresql_where=sa.text('session_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_responses_survey_id_session_id', table_name='responses')
+    op.drop_index('uq_responses_survey_id_user_id', table_name='responses')
@@ -0,0 +1,19 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_surveys_created_at_id', 'surveys', ['created_at', 'id'])
+    op.create_index('ix_surveys_owner_id_created_at_id', 'surveys', ['owner_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_surveys_owner_id_created_at_id', table_name='surveys')
+    op.drop_index('ix_surveys_created_at_id', table_name='surveys')
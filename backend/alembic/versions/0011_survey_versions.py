@@ -0,0 +1,36 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'survey_versions',
+        sa.Column(
+            'survey_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('surveys.id', ondelete='CASCADE'),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('version', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('document', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    # Surveys published before this migration are backfilled in 0014.
+    op.add_column('surveys', sa.Column('published_version', sa.Integer(), nullable=True))
+    op.add_column('responses', sa.Column('survey_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('responses', 'survey_version')
+    op.drop_column('surveys', 'published_version')
+    op.drop_table('survey_versions')
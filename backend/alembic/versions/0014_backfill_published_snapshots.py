@@ -0,0 +1,61 @@
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Surveys published before 0011 have no snapshot; build one in the same
+    # shape as SurveyRead so GET /surveys/{id}/published never has to write.
+    op.execute(
+        """
+        INSERT INTO survey_versions (survey_id, version, document)
+        SELECT s.id,
+               s.version,
+               jsonb_build_object(
+                   'title', s.title,
+                   'description', s.description,
+                   'settings', s.settings,
+                   'id', s.id,
+                   'owner_id', s.owner_id,
+                   'is_published', s.is_published,
+                   'created_at', s.created_at,
+                   'version', s.version,
+                   'questions', coalesce((
+                       SELECT jsonb_agg(
+                           jsonb_build_object(
+                               'text', q.text,
+                               'type', q.type,
+                               'required', q.required,
+                               'order', q."order",
+                               'meta', q.meta,
+                               'id', q.id,
+                               'options', coalesce((
+                                   SELECT jsonb_agg(
+                                       jsonb_build_object('text', o.text, 'order', o."order", 'id', o.id)
+                                       ORDER BY o."order", o.id
+                                   )
+                                   FROM options o WHERE o.question_id = q.id
+                               ), '[]'::jsonb)
+                           )
+                           ORDER BY q."order", q.id
+                       )
+                       FROM questions q WHERE q.survey_id = s.id
+                   ), '[]'::jsonb)
+               )
+        FROM surveys s
+        WHERE s.is_published AND s.published_version IS NULL
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute("UPDATE surveys SET published_version = version WHERE is_published AND published_version IS NULL")
+
+
+def downgrade() -> None:
+    # The backfilled snapshots are indistinguishable from ones taken on publish.
+    pass
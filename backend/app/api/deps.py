@@ -0,0 +1,119 @@
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_active_user
+from app.db import get_session
+from app.models import Question, Response, Survey, SurveyCounter
+from app.schemas import UserRead
+
+
+def _owned_surveys(request: Request) -> dict:
+    if not hasattr(request.state, "owned_surveys"):
+        request.state.owned_surveys = {}
+    return request.state.owned_surveys
+
+
+def _check_owner(survey: Survey, current_user: UserRead) -> None:
+    if survey.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+
+async def get_owned_survey(
+    survey_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_active_user),
+) -> Survey:
+    cache = _owned_surveys(request)
+    survey = cache.get(survey_id)
+    if survey is None:
+        survey = await session.get(Survey, survey_id)
+        if not survey:
+            raise HTTPException(status_code=404, detail="Survey not found")
+        cache[survey_id] = survey
+    _check_owner(survey, current_user)
+    return survey
+
+
+async def get_owned_data_version(
+    survey_id: UUID,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_active_user),
+) -> int:
+    row = (
+        await session.execute(
+            select(Survey.owner_id, SurveyCounter.data_version)
+            .outerjoin(SurveyCounter, SurveyCounter.survey_id == Survey.id)
+            .where(Survey.id == survey_id)
+        )
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    owner_id, data_version = row
+    if owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return data_version or 0
+
+
+async def get_clonable_survey(
+    survey_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_active_user),
+) -> Survey:
+    cache = _owned_surveys(request)
+    survey = cache.get(survey_id)
+    if survey is None:
+        survey = await session.get(Survey, survey_id)
+        if not survey:
+            raise HTTPException(status_code=404, detail="Survey not found")
+        cache[survey_id] = survey
+    if not survey.is_published:
+        _check_owner(survey, current_user)
+    return survey
+
+
+async def get_owned_question(
+    question_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_active_user),
+) -> Question:
+    row = (
+        await session.execute(
+            select(Question, Survey)
+            .join(Survey, Survey.id == Question.survey_id)
+            .where(Question.id == question_id)
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    question, survey = row
+    _owned_surveys(request)[survey.id] = survey
+    _check_owner(survey, current_user)
+    return question
+
+
+async def get_owned_response(
+    response_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_active_user),
+) -> Response:
+    row = (
+        await session.execute(
+            select(Response, Survey)
+            .join(Survey, Survey.id == Response.survey_id)
+            .where(Response.id == response_id)
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Response not found")
+    response, survey = row
+    _owned_surveys(request)[survey.id] = survey
+    _check_owner(survey, current_user)
+    return response
+
@@ -1,13 +1,32 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import get_current_active_user
+from app.api.deps import get_owned_data_version, get_owned_survey
+from app.core.pagination import decode_cursor
 from app.db import get_session
-from app.models import Survey
-from app.schemas import QuestionAnalytics, SurveyAnalytics, UserRead
-from app.services.analytics import get_question_analytics, get_survey_analytics
+from app.models import Question, QuestionType, RollupGranularity, Survey
+from app.schemas import (
+    QuestionAnalytics,
+    ResponseTimeSeries,
+    SegmentedAnalytics,
+    SegmentedAnalyticsRequest,
+    SurveyAnalytics,
+    TextResponsePage,
+)
+from app.services.analytics import (
+    DEFAULT_HISTOGRAM_BUCKETS,
+    get_question_analytics_json,
+    get_response_timeseries_json,
+    get_segmented_analytics_json,
+    get_survey_analytics_json,
+    iter_text_responses,
+)
 
 
 router = APIRouter()
@@ -16,29 +35,87 @@ router = APIRouter()
 @router.get("/{survey_id}/analytics", response_model=SurveyAnalytics)
 async def survey_analytics(
     survey_id: UUID,
+    buckets: int = Query(default=DEFAULT_HISTOGRAM_BUCKETS, ge=1, le=100),
+    data_version: int = Depends(get_owned_data_version),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return await get_survey_analytics(session, survey_id)
+    payload = await get_survey_analytics_json(session, survey_id, data_version, buckets)
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/{survey_id}/analytics/question/{question_id}", response_model=QuestionAnalytics)
 async def question_analytics(
     survey_id: UUID,
     question_id: UUID,
+    buckets: int = Query(default=DEFAULT_HISTOGRAM_BUCKETS, ge=1, le=100),
+    data_version: int = Depends(get_owned_data_version),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return await get_question_analytics(session, survey_id, question_id)
+    payload = await get_question_analytics_json(session, survey_id, question_id, data_version, buckets)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return Response(content=payload, media_type="application/json")
 
 
+@router.post("/{survey_id}/analytics/segments", response_model=SegmentedAnalytics)
+async def segmented_analytics(
+    survey_id: UUID,
+    request: SegmentedAnalyticsRequest,
+    buckets: int = Query(default=DEFAULT_HISTOGRAM_BUCKETS, ge=1, le=100),
+    data_version: int = Depends(get_owned_data_version),
+    session: AsyncSession = Depends(get_session),
+):
+    try:
+        payload = await get_segmented_analytics_json(session, survey_id, data_version, request, buckets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/{survey_id}/analytics/timeseries", response_model=ResponseTimeSeries)
+async def response_timeseries(
+    survey_id: UUID,
+    granularity: RollupGranularity = Query(default=RollupGranularity.hour),
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+    question_id: Optional[UUID] = Query(default=None),
+    data_version: int = Depends(get_owned_data_version),
+    session: AsyncSession = Depends(get_session),
+):
+    try:
+        payload = await get_response_timeseries_json(
+            session, survey_id, data_version, granularity, start, end, question_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/{survey_id}/analytics/question/{question_id}/text", response_model=TextResponsePage)
+async def question_text_responses(
+    survey_id: UUID,
+    question_id: UUID,
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    survey: Survey = Depends(get_owned_survey),
+    session: AsyncSession = Depends(get_session),
+):
+    question_type = (
+        await session.execute(
+            select(Question.type).where(Question.id == question_id, Question.survey_id == survey_id)
+        )
+    ).scalar_one_or_none()
+    if question_type is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    if question_type != QuestionType.text:
+        raise HTTPException(status_code=400, detail="Question is not a text question")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return StreamingResponse(
+        iter_text_responses(survey_id, question_id, after, limit),
+        media_type="application/json",
+    )
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from . import auth, surveys, responses, analytics
+from . import auth, surveys, responses, analytics, metrics
 
 
 api_router = APIRouter()
@@ -9,5 +9,6 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(surveys.router, prefix="/surveys", tags=["surveys"])
 api_router.include_router(responses.router, tags=["responses"])
 api_router.include_router(analytics.router, prefix="/surveys", tags=["analytics"])
+api_router.include_router(metrics.router, tags=["metrics"])
 
 
@@ -1,18 +1,31 @@
+from uuid import UUID
+
 from fastapi import APIRouter, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import auth as auth_utils
 from app.core.config import settings
-from app.crud import create_user, get_user_by_email
+from app.core.workers import WorkerPoolBusy
+from app.crud import create_user, get_user, get_user_by_email
 from app.db import get_session
 from app.models import User, UserRole
 from app.schemas import TokenPair, UserCreate, UserLogin, UserRead
+from app.services.refresh_tokens import issue_refresh_token, revocations, revoke_family, rotate_refresh_token
 
 
 router = APIRouter()
 
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_in: UserCreate,
@@ -21,10 +34,14 @@ async def register_user(
     existing = await get_user_by_email(session, user_in.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        password_hash = await auth_utils.hash_password(user_in.password)
+    except WorkerPoolBusy:
+        raise _busy()
     user = User(
         email=user_in.email,
         full_name=user_in.full_name,
-        password_hash=auth_utils.get_password_hash(user_in.password),
+        password_hash=password_hash,
         role=UserRole.user,
     )
     user = await create_user(session, user)
@@ -37,20 +54,25 @@ async def login(
     session: AsyncSession = Depends(get_session),
 ):
     user = await get_user_by_email(session, form_data.username)
-    if not user or not auth_utils.verify_password(form_data.password, user.password_hash):
+    if not user:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    try:
+        valid, new_hash = await auth_utils.verify_and_update_password(form_data.password, user.password_hash)
+    except WorkerPoolBusy:
+        raise _busy()
+    if not valid:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    if new_hash is not None:
+        user.password_hash = new_hash
 
-    access = auth_utils.create_access_token(str(user.id))
-    refresh = auth_utils.create_refresh_token(str(user.id))
+    token = await issue_refresh_token(session, user.id)
+    await session.commit()
+    access = auth_utils.create_access_token(str(user.id), user, token.family_id)
+    refresh = auth_utils.create_refresh_token(str(user.id), token)
     return TokenPair(access_token=access, refresh_token=refresh)
 
 
-@router.post("/refresh", response_model=TokenPair)
-async def refresh_token(
-    refresh_token: str = Body(..., embed=True),
-):
-    from jose import JWTError, jwt
-
+def _decode_refresh_token(refresh_token: str) -> tuple[UUID, UUID, UUID]:
     try:
         payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=["HS256"])
         if payload.get("type") != "refresh":
@@ -58,17 +80,59 @@ async def refresh_token(
         user_id = payload.get("sub")
         if not user_id:
             raise ValueError("Missing user ID in token")
-    except (JWTError, ValueError) as e:
+        # Tokens issued before rotation carry no jti and cannot be tracked or
+        # revoked, so they are refused and the user has to log in again.
+        if not payload.get("jti") or not payload.get("fam"):
+            raise ValueError("Refresh token predates rotation")
+        return UUID(user_id), UUID(payload["jti"]), UUID(payload["fam"])
+    except (JWTError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
         )
 
-    access = auth_utils.create_access_token(user_id)
-    new_refresh = auth_utils.create_refresh_token(user_id)
+
+@router.post("/refresh", response_model=TokenPair)
+async def refresh_token(
+    refresh_token: str = Body(..., embed=True),
+    session: AsyncSession = Depends(get_session),
+):
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token"
+    )
+    user_id, jti, family_id = _decode_refresh_token(refresh_token)
+    if revocations.is_revoked(family_id):
+        raise invalid
+    family_id = await rotate_refresh_token(session, jti, user_id)
+    if family_id is None:
+        raise invalid
+
+    user = None
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        user = await get_user(session, user_id)
+        if user is None:
+            raise invalid
+    token = await issue_refresh_token(session, user_id, family_id)
+    await session.commit()
+    access = auth_utils.create_access_token(str(user_id), user, token.family_id)
+    new_refresh = auth_utils.create_refresh_token(str(user_id), token)
     return TokenPair(access_token=access, refresh_token=new_refresh)
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    refresh_token: str = Body(..., embed=True),
+    session: AsyncSession = Depends(get_session),
+):
+    _, _, family_id = _decode_refresh_token(refresh_token)
+    expires_at = await revoke_family(session, family_id)
+    await session.commit()
+    if expires_at is not None:
+        revocations.add(family_id, expires_at)
+    return
+
+
 @router.get("/me", response_model=UserRead)
 async def read_me(current_user: UserRead = Depends(auth_utils.get_current_user)):
     return current_user
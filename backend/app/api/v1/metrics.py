@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+
+from app.auth import get_current_admin_user
+from app.core import metrics
+from app.schemas import UserRead
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=dict)
+async def read_metrics(current_user: UserRead = Depends(get_current_admin_user)):
+    return metrics.snapshot()
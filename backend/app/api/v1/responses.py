@@ -1,15 +1,36 @@
 from typing import List, Optional
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response as FastAPIResponse, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response as FastAPIResponse, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import get_current_active_user, get_current_user_optional
-from app.crud import submit_response
+from app.api.deps import get_owned_response, get_owned_survey
+from app.auth import get_current_user_optional
+from app.core.config import settings
+from app.crud import ResponseSubmission, get_responded_survey_ids, insert_responses, submit_response
 from app.db import get_session
 from app.models import Response, Survey
-from app.schemas import ResponseRead, SubmitResponsePayload, UserRead
+from app.schemas import (
+    BatchIngestResult,
+    RespondedCheck,
+    RespondedCheckRequest,
+    ResponseRead,
+    SubmitResponsePayload,
+    UserRead,
+)
+from app.services.export import EXPORT_MEDIA_TYPES, ExportFormat, iter_export, load_export_columns
+from app.services.idempotency import (
+    MAX_KEY_LENGTH,
+    IdempotencyKeyInFlight,
+    IdempotencyKeyReused,
+    claim_idempotency_key,
+    store_idempotent_response,
+)
+from app.services.ingest import IngestFormat, ingest_responses, parse_rows
+from app.services.submit_buffer import BufferFull, submission_buffer
+from app.services.validation import get_survey_plan, validate_answers
 
 
 router = APIRouter()
@@ -36,58 +57,140 @@ async def submit_survey_response(
     payload: SubmitResponsePayload,
     request: Request,
     response: FastAPIResponse,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
     session: AsyncSession = Depends(get_session),
     current_user: Optional[UserRead] = Depends(get_current_user_optional),
 ):
-    survey = await session.get(Survey, survey_id)
-    if not survey or not survey.is_published:
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+
+    plan = await get_survey_plan(session, survey_id)
+    if plan is None or not plan.is_published:
         raise HTTPException(status_code=404, detail="Survey not available")
+    errors = validate_answers(plan, payload.answers)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors)
 
     user_id = current_user.id if current_user is not None else payload.user_id
 
     if current_user is not None:
-        existing_response = await session.execute(
-            select(Response).where(
-                Response.survey_id == survey_id,
-                Response.user_id == current_user.id
-            )
-        )
-        if existing_response.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="You have already submitted a response to this survey"
-            )
         session_id = None
     else:
         session_id = get_or_create_session_id(request, response)
-        
-        existing_response = await session.execute(
-            select(Response).where(
-                Response.survey_id == survey_id,
-                Response.session_id == session_id
-            )
-        )
-        if existing_response.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="You have already submitted a response to this survey"
-            )
 
     meta = {
         "ip": request.client.host if request.client else None,
         "user_agent": request.headers.get("user-agent"),
     }
-    response_obj = await submit_response(
-        session=session,
+    submission = ResponseSubmission(
         survey_id=survey_id,
-        user_id=user_id,
         answers=payload.answers,
-        meta=meta,
+        user_id=user_id,
         session_id=session_id,
+        meta=meta,
+        survey_version=plan.published_version,
     )
+    if idempotency_key is not None:
+        # Retries are rare, so keyed submissions skip the group-commit buffer and
+        # store the key together with the response in one transaction.
+        try:
+            replay = await claim_idempotency_key(
+                session,
+                survey_id,
+                idempotency_key,
+                current_user.id if current_user is not None else None,
+                session_id,
+            )
+        except IdempotencyKeyReused:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        except IdempotencyKeyInFlight:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"},
+            )
+        if replay is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return ResponseRead.model_validate(replay)
+        [response_obj] = await insert_responses(session, [submission])
+        if response_obj is not None:
+            result = ResponseRead.model_validate(response_obj)
+            await store_idempotent_response(session, survey_id, idempotency_key, result.model_dump(mode="json"))
+            await session.commit()
+            return result
+    elif submission_buffer.running:
+        try:
+            response_obj = await submission_buffer.submit(submission)
+        except BufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many submissions, please retry",
+                headers={"Retry-After": "1"},
+            )
+    else:
+        response_obj = await submit_response(
+            session=session,
+            survey_id=survey_id,
+            user_id=user_id,
+            answers=payload.answers,
+            meta=meta,
+            session_id=session_id,
+            survey_version=plan.published_version,
+        )
+    if response_obj is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already submitted a response to this survey"
+        )
     return ResponseRead.model_validate(response_obj)
 
 
+@router.post("/surveys/{survey_id}/responses/batch", response_model=BatchIngestResult)
+async def ingest_survey_responses(
+    survey_id: UUID,
+    request: Request,
+    format: Optional[IngestFormat] = Query(default=None),
+    survey: Survey = Depends(get_owned_survey),
+    session: AsyncSession = Depends(get_session),
+):
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = IngestFormat.csv if content_type.startswith("text/csv") else IngestFormat.ndjson
+    body = await request.body()
+    if len(body) > settings.INGEST_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch is too large")
+    try:
+        data = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Batch must be UTF-8 encoded")
+
+    plan = await get_survey_plan(session, survey_id)
+    try:
+        rows = parse_rows(data, format, plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await ingest_responses(session, plan, rows)
+
+
+@router.post("/surveys/responses/check", response_model=RespondedCheck)
+async def check_user_responses(
+    payload: RespondedCheckRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: Optional[UserRead] = Depends(get_current_user_optional),
+):
+    responded = await get_responded_survey_ids(
+        session,
+        payload.survey_ids,
+        current_user.id if current_user is not None else None,
+        request.cookies.get("survey_session_id") if current_user is None else None,
+    )
+    return RespondedCheck(responded={survey_id: survey_id in responded for survey_id in payload.survey_ids})
+
+
 @router.get("/surveys/{survey_id}/responses/check", response_model=dict)
 async def check_user_response(
     survey_id: UUID,
@@ -95,61 +198,46 @@ async def check_user_response(
     session: AsyncSession = Depends(get_session),
     current_user: Optional[UserRead] = Depends(get_current_user_optional),
 ):
-    if current_user is not None:
-        existing_response = await session.execute(
-            select(Response).where(
-                Response.survey_id == survey_id,
-                Response.user_id == current_user.id
-            )
-        )
-        has_responded = existing_response.scalar_one_or_none() is not None
-    else:
-        session_id = request.cookies.get("survey_session_id")
-        if not session_id:
-            has_responded = False
-        else:
-            existing_response = await session.execute(
-                select(Response).where(
-                    Response.survey_id == survey_id,
-                    Response.session_id == session_id
-                )
-            )
-            has_responded = existing_response.scalar_one_or_none() is not None
-    
-    return {"has_responded": has_responded}
+    responded = await get_responded_survey_ids(
+        session,
+        [survey_id],
+        current_user.id if current_user is not None else None,
+        request.cookies.get("survey_session_id") if current_user is None else None,
+    )
+    return {"has_responded": survey_id in responded}
 
 
 @router.get("/surveys/{survey_id}/responses", response_model=List[ResponseRead])
 async def list_survey_responses(
     survey_id: UUID,
+    survey: Survey = Depends(get_owned_survey),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
     result = await session.execute(select(Response).where(Response.survey_id == survey_id))
     responses = list(result.scalars().unique())
     return [ResponseRead.model_validate(r) for r in responses]
 
 
-@router.get("/responses/{response_id}", response_model=ResponseRead)
-async def get_response_detail(
-    response_id: UUID,
+@router.get("/surveys/{survey_id}/responses/export")
+async def export_survey_responses(
+    survey_id: UUID,
+    format: ExportFormat = Query(default=ExportFormat.csv),
+    survey: Survey = Depends(get_owned_survey),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    response = await session.get(Response, response_id)
-    if not response:
-        raise HTTPException(status_code=404, detail="Response not found")
+    columns = await load_export_columns(session, survey_id)
+    return StreamingResponse(
+        iter_export(survey_id, columns, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="survey-{survey_id}.{format.value}"'},
+    )
 
-    survey = await session.get(Survey, response.survey_id)
-    if not survey or survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
 
+@router.get("/responses/{response_id}", response_model=ResponseRead)
+async def get_response_detail(
+    response_id: UUID,
+    response: Response = Depends(get_owned_response),
+):
     return ResponseRead.model_validate(response)
 
 
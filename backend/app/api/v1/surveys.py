@@ -1,43 +1,84 @@
+import json
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.api.deps import get_clonable_survey, get_owned_question, get_owned_survey
 from app.auth import get_current_active_user, get_current_user_optional
+from app.core.pagination import decode_cursor, encode_cursor
 from app.crud import (
     add_option_to_question,
     add_question_to_survey,
+    clone_survey,
     create_survey_with_questions,
     delete_question,
     delete_survey,
+    get_responded_survey_ids,
+    invalidate_survey,
+    list_survey_summaries,
     list_surveys,
+    patch_survey_structure,
+    snapshot_published_version,
     update_question,
     update_survey,
 )
 from app.db import get_session
-from app.models import Question, Survey
+from app.models import Question, Response as SurveyResponse, Survey, SurveyVersion
 from app.schemas import (
     OptionCreate,
     QuestionCreate,
     QuestionRead,
     QuestionUpdate,
+    SurveyClone,
     SurveyCreate,
     SurveyRead,
+    SurveyStructurePatch,
+    SurveySummary,
+    SurveySummaryPage,
     SurveyUpdate,
+    SurveyVersionInfo,
     UserRead,
 )
+from app.services.survey_cache import get_survey_json, get_survey_version, survey_etag
 
 
+MAX_PAGE_SIZE = 100
+
 router = APIRouter()
 
 
+def _respondent(request: Request, current_user: Optional[UserRead]) -> tuple[Optional[UUID], Optional[str]]:
+    if current_user is not None:
+        return current_user.id, None
+    return None, request.cookies.get("survey_session_id")
+
+
+def _decode_page_cursor(cursor: Optional[str]):
+    try:
+        return decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
 @router.get("", response_model=List[SurveyRead])
 async def get_surveys(
+    request: Request,
+    response: Response,
     owner_id: Optional[UUID] = Query(default=None),
     published: Optional[bool] = Query(default=None),
+    include_responded: bool = Query(default=False),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
     session: AsyncSession = Depends(get_session),
     current_user: Optional[UserRead] = Depends(get_current_user_optional),
 ):
@@ -48,8 +89,51 @@ async def get_surveys(
         session=session,
         owner_id=owner_id,
         published=published,
+        after=_decode_page_cursor(cursor),
+        limit=limit + 1 if limit is not None else None,
+    )
+    if limit is not None and len(surveys) > limit:
+        surveys = surveys[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(surveys[-1].created_at, surveys[-1].id)
+    result = [SurveyRead.model_validate(s) for s in surveys]
+    if include_responded:
+        responded = await get_responded_survey_ids(session, [s.id for s in result], *_respondent(request, current_user))
+        for s in result:
+            s.has_responded = s.id in responded
+    return result
+
+
+@router.get("/summary", response_model=SurveySummaryPage)
+async def get_survey_summaries(
+    request: Request,
+    owner_id: Optional[UUID] = Query(default=None),
+    published: Optional[bool] = Query(default=None),
+    include_responded: bool = Query(default=False),
+    limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    session: AsyncSession = Depends(get_session),
+    current_user: Optional[UserRead] = Depends(get_current_user_optional),
+):
+    if owner_id is None and current_user is None and published is None:
+        published = True
+
+    rows = await list_survey_summaries(
+        session=session,
+        owner_id=owner_id,
+        published=published,
+        after=_decode_page_cursor(cursor),
+        limit=limit + 1,
     )
-    return [SurveyRead.model_validate(s) for s in surveys]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    items = [SurveySummary(**row) for row in rows]
+    if include_responded:
+        responded = await get_responded_survey_ids(session, [s.id for s in items], *_respondent(request, current_user))
+        for s in items:
+            s.has_responded = s.id in responded
+    return SurveySummaryPage(items=items, next_cursor=next_cursor)
 
 
 @router.post("", response_model=SurveyRead, status_code=status.HTTP_201_CREATED)
@@ -65,30 +149,106 @@ async def create_survey(
 @router.get("/{survey_id}", response_model=SurveyRead)
 async def get_survey_detail(
     survey_id: UUID,
+    if_none_match: Optional[str] = Header(default=None),
     session: AsyncSession = Depends(get_session),
     current_user: Optional[UserRead] = Depends(get_current_user_optional),
 ):
-    survey: Survey | None = await session.get(Survey, survey_id)
-    if not survey:
+    current = await get_survey_version(session, survey_id)
+    if current is None:
         raise HTTPException(status_code=404, detail="Survey not found")
-    await session.refresh(survey, attribute_names=["questions"])
-    for q in survey.questions:
-        await session.refresh(q, attribute_names=["options"])
-    return SurveyRead.model_validate(survey)
+    version, is_published = current
+    headers = {
+        "ETag": survey_etag(survey_id, version),
+        "Cache-Control": "public, no-cache" if is_published else "private, no-cache",
+    }
+    if _not_modified(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    rendered = await get_survey_json(session, survey_id, version)
+    if rendered is None:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    version, body = rendered
+    headers["ETag"] = survey_etag(survey_id, version)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{survey_id}/published", response_model=SurveyRead)
+async def get_published_survey(
+    survey_id: UUID,
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+):
+    row = (
+        await session.execute(
+            select(SurveyVersion.version, SurveyVersion.document)
+            .join(
+                Survey,
+                and_(Survey.id == SurveyVersion.survey_id, Survey.published_version == SurveyVersion.version),
+            )
+            .where(SurveyVersion.survey_id == survey_id, Survey.is_published.is_(True))
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Survey not available")
+
+    version, document = row
+    headers = {"ETag": survey_etag(survey_id, version), "Cache-Control": "public, no-cache"}
+    if _not_modified(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=json.dumps(document).encode(), media_type="application/json", headers=headers)
+
+
+@router.get("/{survey_id}/versions", response_model=List[SurveyVersionInfo])
+async def list_survey_versions(
+    survey_id: UUID,
+    survey: Survey = Depends(get_owned_survey),
+    session: AsyncSession = Depends(get_session),
+):
+    rows = await session.execute(
+        select(SurveyVersion.version, SurveyVersion.created_at, func.count(SurveyResponse.id))
+        .outerjoin(
+            SurveyResponse,
+            and_(
+                SurveyResponse.survey_id == SurveyVersion.survey_id,
+                SurveyResponse.survey_version == SurveyVersion.version,
+            ),
+        )
+        .where(SurveyVersion.survey_id == survey_id)
+        .group_by(SurveyVersion.version, SurveyVersion.created_at)
+        .order_by(SurveyVersion.version)
+    )
+    return [
+        SurveyVersionInfo(version=version, created_at=created_at, response_count=response_count)
+        for version, created_at, response_count in rows
+    ]
+
+
+@router.get("/{survey_id}/versions/{version}", response_model=SurveyRead)
+async def get_survey_version_snapshot(
+    survey_id: UUID,
+    version: int,
+    session: AsyncSession = Depends(get_session),
+):
+    snapshot: SurveyVersion | None = await session.get(SurveyVersion, (survey_id, version))
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Survey version not found")
+    return Response(
+        content=json.dumps(snapshot.document).encode(),
+        media_type="application/json",
+        headers={
+            "ETag": survey_etag(survey_id, version),
+            "Cache-Control": "public, max-age=31536000, immutable",
+        },
+    )
 
 
 @router.put("/{survey_id}", response_model=SurveyRead)
 async def update_survey_endpoint(
     survey_id: UUID,
     survey_in: SurveyUpdate,
+    survey: Survey = Depends(get_owned_survey),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey: Survey | None = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     survey = await update_survey(session, survey, survey_in)
     return SurveyRead.model_validate(survey)
 
@@ -96,14 +256,9 @@ async def update_survey_endpoint(
 @router.delete("/{survey_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_survey_endpoint(
     survey_id: UUID,
+    survey: Survey = Depends(get_owned_survey),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey: Survey | None = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     await delete_survey(session, survey)
     return
 
@@ -111,17 +266,15 @@ async def delete_survey_endpoint(
 @router.post("/{survey_id}/publish", response_model=SurveyRead)
 async def toggle_publish(
     survey_id: UUID,
+    survey: Survey = Depends(get_owned_survey),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey: Survey | None = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     survey.is_published = not survey.is_published
+    survey.version = Survey.version + 1
     session.add(survey)
+    await snapshot_published_version(session, survey_id)
     await session.commit()
+    invalidate_survey(survey_id)
     result = await session.execute(
         select(Survey)
         .where(Survey.id == survey_id)
@@ -133,18 +286,39 @@ async def toggle_publish(
     return SurveyRead.model_validate(survey)
 
 
+@router.post("/{survey_id}/clone", response_model=SurveyRead, status_code=status.HTTP_201_CREATED)
+async def clone_survey_endpoint(
+    survey_id: UUID,
+    clone_in: Optional[SurveyClone] = None,
+    survey: Survey = Depends(get_clonable_survey),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserRead = Depends(get_current_active_user),
+):
+    clone = await clone_survey(session, survey_id, current_user.id, clone_in.title if clone_in else None)
+    return SurveyRead.model_validate(clone)
+
+
+@router.patch("/{survey_id}/structure", response_model=SurveyRead)
+async def patch_survey_structure_endpoint(
+    survey_id: UUID,
+    patch: SurveyStructurePatch,
+    survey: Survey = Depends(get_owned_survey),
+    session: AsyncSession = Depends(get_session),
+):
+    try:
+        survey = await patch_survey_structure(session, survey_id, patch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SurveyRead.model_validate(survey)
+
+
 @router.post("/{survey_id}/questions", response_model=QuestionRead, status_code=status.HTTP_201_CREATED)
 async def add_question(
     survey_id: UUID,
     q_in: QuestionCreate,
+    survey: Survey = Depends(get_owned_survey),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    survey: Survey | None = await session.get(Survey, survey_id)
-    if not survey:
-        raise HTTPException(status_code=404, detail="Survey not found")
-    if survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     question = await add_question_to_survey(session, survey_id, q_in)
     return QuestionRead.model_validate(question)
 
@@ -153,15 +327,9 @@ async def add_question(
 async def update_question_endpoint(
     question_id: UUID,
     q_in: QuestionUpdate,
+    question: Question = Depends(get_owned_question),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    question: Question | None = await session.get(Question, question_id)
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-    survey: Survey | None = await session.get(Survey, question.survey_id)
-    if not survey or survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     question = await update_question(session, question, q_in)
     return QuestionRead.model_validate(question)
 
@@ -169,15 +337,9 @@ async def update_question_endpoint(
 @router.delete("/questions/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question_endpoint(
     question_id: UUID,
+    question: Question = Depends(get_owned_question),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    question: Question | None = await session.get(Question, question_id)
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-    survey: Survey | None = await session.get(Survey, question.survey_id)
-    if not survey or survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     await delete_question(session, question)
     return
 
@@ -186,15 +348,9 @@ async def delete_question_endpoint(
 async def add_option(
     question_id: UUID,
     opt_in: OptionCreate,
+    question: Question = Depends(get_owned_question),
     session: AsyncSession = Depends(get_session),
-    current_user: UserRead = Depends(get_current_active_user),
 ):
-    question: Question | None = await session.get(Question, question_id)
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
-    survey: Survey | None = await session.get(Survey, question.survey_id)
-    if not survey or survey.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
     await add_option_to_question(session, question_id, opt_in.text, opt_in.order)
     await session.refresh(question, attribute_names=["options"])
     return QuestionRead.model_validate(question)
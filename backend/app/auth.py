@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
@@ -9,13 +10,23 @@ from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.workers import BoundedWorkerPool, WorkerPoolBusy
 from app.crud import get_user, get_user_by_email
 from app.db import get_session
-from app.models import User, UserRole
+from app.models import RefreshToken, User, UserRole
 from app.schemas import TokenPayload, UserRead
+from app.services.principals import cache_principal, get_cached_principal, record_resolution
+from app.services.refresh_tokens import revocations
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a few threads keep hashing off the event loop.
+password_hasher = BoundedWorkerPool(
+    "password_hasher",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
 
 oauth2_scheme = HTTPBearer(auto_error=False)
 
@@ -30,29 +41,98 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def _create_token(subject: str, expires_delta: timedelta, token_type: str) -> str:
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    valid = await password_hasher.run(verify_password, plain_password, hashed_password)
+    if valid and pwd_context.needs_update(hashed_password):
+        # The stored hash predates the current cost settings: upgrade it while we know the password.
+        # The upgrade is best-effort; when the pool is saturated a later login retries it.
+        try:
+            return True, await hash_password(plain_password)
+        except WorkerPoolBusy:
+            return True, None
+    return valid, None
+
+
+def _create_token(subject: str, expires_delta: timedelta, token_type: str, claims: Optional[dict] = None) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"sub": subject, "exp": expire, "type": token_type}
+    to_encode = {**(claims or {}), "sub": subject, "exp": expire, "type": token_type}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, user: Optional[User] = None, family_id: Optional[UUID] = None) -> str:
+    claims = {}
+    if family_id is not None:
+        claims["fam"] = str(family_id)
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS and user is not None:
+        claims.update(
+            email=user.email,
+            name=user.full_name,
+            role=user.role.value,
+            created=user.created_at.isoformat(),
+        )
     return _create_token(
         subject=subject,
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
         token_type="access",
+        claims=claims,
     )
 
 
-def create_refresh_token(subject: str) -> str:
+def create_refresh_token(subject: str, token: RefreshToken) -> str:
     return _create_token(
         subject=subject,
         expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
         token_type="refresh",
+        claims={"jti": str(token.jti), "fam": str(token.family_id)},
     )
 
 
+def _decode_access_token(token: str) -> Optional[TokenPayload]:
+    try:
+        data = TokenPayload(**jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]))
+        UUID(data.sub)
+        family_id = UUID(data.fam) if data.fam is not None else None
+    except (JWTError, ValueError):
+        return None
+    if data.type != "access":
+        return None
+    if family_id is not None and revocations.is_revoked(family_id):
+        return None
+    return data
+
+
+async def _resolve_principal(token: str, session: AsyncSession) -> Optional[UserRead]:
+    started = time.perf_counter()
+    data = _decode_access_token(token)
+    if data is None:
+        record_resolution("rejected", started)
+        return None
+    user_id = UUID(data.sub)
+
+    if data.email is not None and data.role is not None and data.created is not None:
+        record_resolution("claims", started)
+        return UserRead(id=user_id, email=data.email, full_name=data.name, role=data.role, created_at=data.created)
+
+    principal = get_cached_principal(user_id)
+    if principal is not None:
+        record_resolution("cache", started)
+        return principal
+
+    user = await get_user(session, user_id)
+    if not user:
+        record_resolution("rejected", started)
+        return None
+    principal = UserRead.model_validate(user)
+    cache_principal(principal)
+    record_resolution("database", started)
+    return principal
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_session),
@@ -62,58 +142,23 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    if not credentials:
-        raise credentials_exception
-    
-    token = credentials.credentials
-    
-    if not token:
-        raise credentials_exception
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        data = TokenPayload(**payload)
-    except (JWTError, ValueError) as e:
-        raise credentials_exception
 
-    if data.type != "access":
+    if not credentials or not credentials.credentials:
         raise credentials_exception
 
-    try:
-        user_id = UUID(data.sub)
-    except ValueError:
+    principal = await _resolve_principal(credentials.credentials, session)
+    if principal is None:
         raise credentials_exception
-
-    user = await get_user(session, user_id)
-    if not user:
-        raise credentials_exception
-
-    return UserRead.model_validate(user)
+    return principal
 
 
 async def get_current_user_optional(
     credentials: HTTPAuthorizationCredentials | None = Depends(oauth2_scheme),
     session: AsyncSession = Depends(get_session),
 ) -> Optional[UserRead]:
-    if not credentials:
-        return None
-    
-    token = credentials.credentials
-    
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        data = TokenPayload(**payload)
-        if data.type != "access":
-            return None
-        user_id = UUID(data.sub)
-    except Exception:
-        return None
-
-    user = await get_user(session, user_id)
-    if not user:
+    if not credentials or not credentials.credentials:
         return None
-    return UserRead.model_validate(user)
+    return await _resolve_principal(credentials.credentials, session)
 
 
 async def get_current_active_user(current_user: UserRead = Depends(get_current_user)) -> UserRead:
@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import sys
+from typing import Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.db import async_session_maker
+from app.models import Survey
+from app.services.counters import check_survey_counters, rebuild_survey_counters
+from app.services.ingest import IngestFormat, ingest_responses, parse_rows
+from app.services.validation import compile_survey_plan
+
+
+async def check_counters(survey_id: Optional[UUID], fix: bool) -> int:
+    async with async_session_maker() as session:
+        if survey_id is not None:
+            survey_ids = [survey_id]
+        else:
+            survey_ids = list((await session.execute(select(Survey.id))).scalars())
+
+        mismatched = 0
+        for sid in survey_ids:
+            problems = await check_survey_counters(session, sid)
+            if not problems:
+                continue
+            mismatched += 1
+            print(f"survey {sid}: {len(problems)} mismatched counter(s)")
+            for problem in problems:
+                print(f"  {problem}")
+            if fix:
+                await rebuild_survey_counters(session, sid)
+                await session.commit()
+                print(f"survey {sid}: counters rebuilt")
+        await session.rollback()
+
+    print(f"checked {len(survey_ids)} survey(s), {mismatched} with mismatches")
+    return 1 if mismatched and not fix else 0
+
+
+async def import_responses(survey_id: UUID, path: str, ingest_format: Optional[IngestFormat]) -> int:
+    if ingest_format is None:
+        ingest_format = IngestFormat.csv if path.endswith(".csv") else IngestFormat.ndjson
+    with open(path, encoding="utf-8-sig") as f:
+        data = f.read()
+
+    async with async_session_maker() as session:
+        plan = await compile_survey_plan(session, survey_id)
+        if plan is None:
+            print(f"survey {survey_id} not found")
+            return 1
+        try:
+            rows = parse_rows(data, ingest_format, plan)
+        except ValueError as e:
+            print(f"cannot read {path}: {e}")
+            return 1
+        result = await ingest_responses(session, plan, rows)
+
+    for error in result.errors:
+        print(f"row {error.row}: " + "; ".join(e.get("error", "") for e in error.errors))
+    print(f"imported {result.accepted} response(s), rejected {result.rejected}")
+    return 1 if result.rejected else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser("check-counters", help="compare analytics counters against a full recount")
+    check.add_argument("--survey", type=UUID, default=None, help="check a single survey")
+    check.add_argument("--fix", action="store_true", help="rebuild counters that do not match")
+
+    ingest = commands.add_parser("import-responses", help="bulk load responses from an NDJSON or CSV file")
+    ingest.add_argument("survey", type=UUID)
+    ingest.add_argument("path")
+    ingest.add_argument("--format", type=IngestFormat, choices=list(IngestFormat), default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "check-counters":
+        return asyncio.run(check_counters(args.survey, args.fix))
+    if args.command == "import-responses":
+        return asyncio.run(import_responses(args.survey, args.path, args.format))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import math
+import re
+from typing import Optional
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+class AdmissionLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, timeout_seconds: float) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        metrics.register(f"admission.{name}", self.stats)
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout_seconds))
+
+    async def acquire(self) -> None:
+        # Reject outright once the queue is full: a caller that would sit behind
+        # max_queue others is better served by a fast 503 than a slow one.
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AdmissionRejected()
+        finally:
+            self.queued -= 1
+        self.active += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+limiters = {
+    "public": AdmissionLimiter(
+        "public",
+        settings.ADMISSION_PUBLIC_MAX_CONCURRENT,
+        settings.ADMISSION_PUBLIC_MAX_QUEUE,
+        settings.ADMISSION_PUBLIC_TIMEOUT_SECONDS,
+    ),
+    "submit": AdmissionLimiter(
+        "submit",
+        settings.ADMISSION_SUBMIT_MAX_CONCURRENT,
+        settings.ADMISSION_SUBMIT_MAX_QUEUE,
+        settings.ADMISSION_SUBMIT_TIMEOUT_SECONDS,
+    ),
+    "analytics": AdmissionLimiter(
+        "analytics",
+        settings.ADMISSION_ANALYTICS_MAX_CONCURRENT,
+        settings.ADMISSION_ANALYTICS_MAX_QUEUE,
+        settings.ADMISSION_ANALYTICS_TIMEOUT_SECONDS,
+    ),
+    "auth": AdmissionLimiter(
+        "auth",
+        settings.ADMISSION_AUTH_MAX_CONCURRENT,
+        settings.ADMISSION_AUTH_MAX_QUEUE,
+        settings.ADMISSION_AUTH_TIMEOUT_SECONDS,
+    ),
+}
+
+
+_ID = r"[^/]+"
+_SUBMIT_PATH = re.compile(rf"^/api/v1/surveys/{_ID}/responses$")
+# Owner-only reads that scan a whole survey's responses.
+_ANALYTICS_PATH = re.compile(
+    rf"^/api/v1/surveys/{_ID}/(analytics(/.*)?|responses(/export|/batch)?)$"
+)
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    if path.startswith("/api/v1/auth/"):
+        return "auth"
+    if method == "POST" and _SUBMIT_PATH.match(path):
+        return "submit"
+    if _ANALYTICS_PATH.match(path):
+        return "analytics"
+    if method in ("GET", "HEAD") and path.startswith("/api/v1/surveys"):
+        return "public"
+    if path == "/api/v1/surveys/responses/check":
+        return "public"
+    return None
+
+
+class AdmissionMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[route_class]
+        try:
+            await limiter.acquire()
+        except AdmissionRejected:
+            await self._reject(send, limiter)
+            return
+        # Held until the response body is fully sent, so streamed exports and
+        # text pages count against their class for as long as they hold a connection.
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send, limiter: AdmissionLimiter) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(limiter.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
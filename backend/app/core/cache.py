@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+from app.core import metrics
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        sizeof: Optional[Callable[[V], int]] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof or (lambda value: 1)
+        self._data: "OrderedDict[K, tuple[V, int, Optional[float]]]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        metrics.register(f"cache.{name}", self.stats)
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            self.pop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: K, value: V) -> None:
+        weight = self._sizeof(value)
+        if weight > self.max_size:
+            return
+        self.pop(key)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        self._data[key] = (value, weight, expires_at)
+        self.size += weight
+        while self.size > self.max_size:
+            _, (_, evicted_weight, _) = self._data.popitem(last=False)
+            self.size -= evicted_weight
+            self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -13,6 +13,42 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "change_me"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    ACCESS_TOKEN_EMBED_CLAIMS: bool = False
+    REVOCATION_RESYNC_SECONDS: float = 300.0
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    ANALYTICS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    VALIDATION_PLAN_CACHE_SIZE: int = 1024
+    VALIDATION_PLAN_TTL_SECONDS: float = 30.0
+    INGEST_MAX_BYTES: int = 50 * 1024 * 1024
+    SURVEY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    SUBMIT_BUFFER_ENABLED: bool = False
+    SUBMIT_BUFFER_MAX_QUEUE: int = 10000
+    SUBMIT_BUFFER_BATCH_SIZE: int = 500
+    SUBMIT_BUFFER_MAX_DELAY_SECONDS: float = 0.01
+
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_CLEANUP_PROBABILITY: float = 0.01
+    IDEMPOTENCY_CLEANUP_BATCH_SIZE: int = 1000
+
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_PUBLIC_MAX_CONCURRENT: int = 64
+    ADMISSION_PUBLIC_MAX_QUEUE: int = 256
+    ADMISSION_PUBLIC_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_SUBMIT_MAX_CONCURRENT: int = 64
+    ADMISSION_SUBMIT_MAX_QUEUE: int = 512
+    ADMISSION_SUBMIT_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_ANALYTICS_MAX_CONCURRENT: int = 4
+    ADMISSION_ANALYTICS_MAX_QUEUE: int = 16
+    ADMISSION_ANALYTICS_TIMEOUT_SECONDS: float = 1.0
+    ADMISSION_AUTH_MAX_CONCURRENT: int = 16
+    ADMISSION_AUTH_MAX_QUEUE: int = 64
+    ADMISSION_AUTH_TIMEOUT_SECONDS: float = 2.0
 
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] | List[str] = Field(
         default_factory=lambda: ["http://localhost:3000"]
@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core import metrics
+
+
+class WorkerPoolBusy(Exception):
+    pass
+
+
+class BoundedWorkerPool:
+    def __init__(self, name: str, max_workers: int, max_pending: int) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        metrics.register(f"workers.{name}", self.stats)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Shed load instead of queueing without bound: past max_pending a caller
+        # would wait longer than a client is willing to.
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise WorkerPoolBusy()
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -1,18 +1,37 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
 from typing import List, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import String, cast, false, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models import AnswerOption, AnswerValue, Option, Question, Response, Survey, User
+from app.db import MAX_BIND_PARAMS
+from app.models import (
+    AnswerOption,
+    AnswerValue,
+    Option,
+    Question,
+    Response,
+    Survey,
+    SurveyCounter,
+    SurveyVersion,
+    User,
+)
 from app.schemas import (
     AnswerValueSubmit,
     QuestionCreate,
     QuestionUpdate,
     SurveyCreate,
+    SurveyRead,
+    SurveyStructurePatch,
     SurveyUpdate,
 )
+from app.services.counters import bump_data_version, bump_data_version_for_question, record_responses
+from app.services.survey_cache import invalidate_survey_json
 
 
 async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
@@ -32,69 +51,220 @@ async def get_user(session: AsyncSession, user_id: UUID) -> Optional[User]:
     return result.scalars().first()
 
 
+async def bump_survey_version(session: AsyncSession, survey_id: UUID) -> None:
+    await session.execute(update(Survey).where(Survey.id == survey_id).values(version=Survey.version + 1))
+
+
+async def snapshot_published_version(session: AsyncSession, survey_id: UUID) -> Optional[int]:
+    survey = (
+        await session.execute(
+            select(Survey)
+            .where(Survey.id == survey_id)
+            .options(selectinload(Survey.questions).selectinload(Question.options))
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one_or_none()
+    if survey is None or not survey.is_published:
+        return None
+    document = SurveyRead.model_validate(survey).model_dump(mode="json", exclude={"has_responded"})
+    await session.execute(
+        pg_insert(SurveyVersion)
+        .values(survey_id=survey_id, version=survey.version, document=document)
+        .on_conflict_do_nothing()
+    )
+    survey.published_version = survey.version
+    return survey.version
+
+
+def invalidate_survey(survey_id: UUID) -> None:
+    invalidate_survey_json(survey_id)
+
+
+async def _insert_many(session: AsyncSession, model, rows: List[dict]) -> None:
+    if not rows:
+        return
+    chunk_size = max(1, MAX_BIND_PARAMS // len(rows[0]))
+    for idx in range(0, len(rows), chunk_size):
+        await session.execute(insert(model.__table__).values(rows[idx:idx + chunk_size]))
+
+
+async def _load_survey(session: AsyncSession, survey_id: UUID) -> Survey:
+    result = await session.execute(
+        select(Survey)
+        .where(Survey.id == survey_id)
+        .options(
+            selectinload(Survey.questions).selectinload(Question.options)
+        )
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
 async def create_survey_with_questions(
     session: AsyncSession,
     owner_id: UUID,
     survey_in: SurveyCreate,
 ) -> Survey:
-    survey = Survey(
-        title=survey_in.title,
-        description=survey_in.description,
-        owner_id=owner_id,
-        settings=survey_in.settings,
-    )
-    session.add(survey)
-    await session.flush()
-
-    if survey_in.questions:
-        for idx, q in enumerate(survey_in.questions):
-            question = Question(
-                survey_id=survey.id,
-                text=q.text,
-                type=q.type,
-                required=q.required,
-                order=q.order if q.order is not None else idx,
-                meta=q.meta,
+    survey_id = uuid4()
+    question_rows = []
+    option_rows = []
+    for idx, q in enumerate(survey_in.questions or []):
+        question_id = uuid4()
+        question_rows.append(
+            {
+                "id": question_id,
+                "survey_id": survey_id,
+                "text": q.text,
+                "type": q.type,
+                "required": q.required,
+                "order": q.order if q.order is not None else idx,
+                "meta": q.meta,
+            }
+        )
+        for o_idx, opt in enumerate(q.options or []):
+            option_rows.append(
+                {
+                    "id": uuid4(),
+                    "question_id": question_id,
+                    "text": opt.text,
+                    "order": opt.order if opt.order is not None else o_idx,
+                }
             )
-            session.add(question)
-            await session.flush()
-            if q.options:
-                for o_idx, opt in enumerate(q.options):
-                    option = Option(
-                        question_id=question.id,
-                        text=opt.text,
-                        order=opt.order if opt.order is not None else o_idx,
-                    )
-                    session.add(option)
 
+    await session.execute(
+        insert(Survey).values(
+            id=survey_id,
+            title=survey_in.title,
+            description=survey_in.description,
+            owner_id=owner_id,
+            settings=survey_in.settings,
+            is_published=False,
+        )
+    )
+    await _insert_many(session, Question, question_rows)
+    await _insert_many(session, Option, option_rows)
     await session.commit()
-    result = await session.execute(
-        select(Survey)
-        .where(Survey.id == survey.id)
-        .options(
-            selectinload(Survey.questions).selectinload(Question.options)
+    return await _load_survey(session, survey_id)
+
+
+async def clone_survey(
+    session: AsyncSession,
+    source_id: UUID,
+    owner_id: UUID,
+    title: Optional[str] = None,
+) -> Survey:
+    survey_id = uuid4()
+    # Derive the copies' ids from the originals so options can find their new
+    # question without a round trip per row.
+    salt = str(survey_id)
+
+    def remap(column):
+        return cast(func.md5(cast(column, String) + salt), PG_UUID(as_uuid=True))
+
+    await session.execute(
+        insert(Survey).from_select(
+            ["id", "title", "description", "owner_id", "is_published", "settings"],
+            select(
+                literal(survey_id, PG_UUID(as_uuid=True)),
+                literal(title, String) if title is not None else Survey.title,
+                Survey.description,
+                literal(owner_id, PG_UUID(as_uuid=True)),
+                false(),
+                Survey.settings,
+            ).where(Survey.id == source_id),
         )
     )
-    survey = result.scalar_one()
-    return survey
+    await session.execute(
+        insert(Question).from_select(
+            ["id", "survey_id", "text", "type", "required", "order", "meta"],
+            select(
+                remap(Question.id),
+                literal(survey_id, PG_UUID(as_uuid=True)),
+                Question.text,
+                Question.type,
+                Question.required,
+                Question.order,
+                Question.meta,
+            ).where(Question.survey_id == source_id),
+        )
+    )
+    await session.execute(
+        insert(Option).from_select(
+            ["id", "question_id", "text", "order"],
+            select(remap(Option.id), remap(Option.question_id), Option.text, Option.order)
+            .join(Question, Question.id == Option.question_id)
+            .where(Question.survey_id == source_id),
+        )
+    )
+    await session.commit()
+    return await _load_survey(session, survey_id)
+
+
+def _filter_surveys(stmt, owner_id: Optional[UUID], published: Optional[bool], after: Optional[tuple[datetime, UUID]]):
+    if owner_id is not None:
+        stmt = stmt.where(Survey.owner_id == owner_id)
+    if published is not None:
+        stmt = stmt.where(Survey.is_published == published)
+    if after is not None:
+        stmt = stmt.where(tuple_(Survey.created_at, Survey.id) < after)
+    return stmt.order_by(Survey.created_at.desc(), Survey.id.desc())
 
 
 async def list_surveys(
     session: AsyncSession,
     owner_id: Optional[UUID] = None,
     published: Optional[bool] = None,
+    after: Optional[tuple[datetime, UUID]] = None,
+    limit: Optional[int] = None,
 ) -> List[Survey]:
-    stmt = select(Survey).options(
-        selectinload(Survey.questions).selectinload(Question.options)
+    stmt = _filter_surveys(
+        select(Survey).options(selectinload(Survey.questions).selectinload(Question.options)),
+        owner_id,
+        published,
+        after,
     )
-    if owner_id is not None:
-        stmt = stmt.where(Survey.owner_id == owner_id)
-    if published is not None:
-        stmt = stmt.where(Survey.is_published == published)
-    result = await session.execute(stmt.order_by(Survey.created_at.desc()))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await session.execute(stmt)
     return list(result.scalars().unique())
 
 
+async def list_survey_summaries(
+    session: AsyncSession,
+    owner_id: Optional[UUID] = None,
+    published: Optional[bool] = None,
+    after: Optional[tuple[datetime, UUID]] = None,
+    limit: int = 20,
+) -> list:
+    page = _filter_surveys(
+        select(
+            Survey.id,
+            Survey.title,
+            Survey.description,
+            Survey.owner_id,
+            Survey.is_published,
+            Survey.created_at,
+            Survey.version,
+        ),
+        owner_id,
+        published,
+        after,
+    ).limit(limit).subquery()
+    result = await session.execute(
+        select(
+            page,
+            func.count(Question.id).label("question_count"),
+            func.coalesce(func.max(SurveyCounter.response_count), 0).label("response_count"),
+        )
+        .select_from(page)
+        .outerjoin(Question, Question.survey_id == page.c.id)
+        .outerjoin(SurveyCounter, SurveyCounter.survey_id == page.c.id)
+        .group_by(*page.c)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    return list(result.mappings())
+
+
 async def get_survey_with_questions(session: AsyncSession, survey_id: UUID) -> Optional[Survey]:
     result = await session.execute(
         select(Survey)
@@ -114,8 +284,11 @@ async def update_survey(
     data = survey_in.model_dump(exclude_unset=True)
     for field, value in data.items():
         setattr(survey, field, value)
+    survey.version = Survey.version + 1
     session.add(survey)
+    await snapshot_published_version(session, survey.id)
     await session.commit()
+    invalidate_survey(survey.id)
     result = await session.execute(
         select(Survey)
         .where(Survey.id == survey.id)
@@ -130,6 +303,7 @@ async def update_survey(
 async def delete_survey(session: AsyncSession, survey: Survey) -> None:
     await session.delete(survey)
     await session.commit()
+    invalidate_survey(survey.id)
 
 
 async def add_question_to_survey(
@@ -155,7 +329,11 @@ async def add_question_to_survey(
                 order=opt.order if opt.order is not None else o_idx,
             )
             session.add(option)
+    await bump_data_version(session, survey_id)
+    await bump_survey_version(session, survey_id)
+    await snapshot_published_version(session, survey_id)
     await session.commit()
+    invalidate_survey(survey_id)
     await session.refresh(question)
     return question
 
@@ -169,14 +347,71 @@ async def update_question(
     for field, value in data.items():
         setattr(question, field, value)
     session.add(question)
+    await bump_data_version(session, question.survey_id)
+    await bump_survey_version(session, question.survey_id)
+    await snapshot_published_version(session, question.survey_id)
     await session.commit()
+    invalidate_survey(question.survey_id)
     await session.refresh(question)
     return question
 
 
 async def delete_question(session: AsyncSession, question: Question) -> None:
+    survey_id = question.survey_id
+    await bump_data_version(session, survey_id)
+    await bump_survey_version(session, survey_id)
     await session.delete(question)
+    await session.flush()
+    await snapshot_published_version(session, survey_id)
     await session.commit()
+    invalidate_survey(survey_id)
+
+
+async def patch_survey_structure(
+    session: AsyncSession,
+    survey_id: UUID,
+    patch: SurveyStructurePatch,
+) -> Survey:
+    question_rows = [q.model_dump(exclude_unset=True) for q in patch.questions]
+    option_rows = [o.model_dump(exclude_unset=True) for o in patch.options]
+    question_ids = {row["id"] for row in question_rows}
+    option_ids = {row["id"] for row in option_rows}
+    if len(question_ids) != len(question_rows) or len(option_ids) != len(option_rows):
+        raise ValueError("Each question and option may appear only once")
+
+    if question_ids:
+        found = set(
+            (
+                await session.execute(
+                    select(Question.id).where(Question.survey_id == survey_id, Question.id.in_(question_ids))
+                )
+            ).scalars()
+        )
+        if found != question_ids:
+            raise ValueError(f"Unknown question id: {next(iter(question_ids - found))}")
+    if option_ids:
+        found = set(
+            (
+                await session.execute(
+                    select(Option.id)
+                    .join(Question, Question.id == Option.question_id)
+                    .where(Question.survey_id == survey_id, Option.id.in_(option_ids))
+                )
+            ).scalars()
+        )
+        if found != option_ids:
+            raise ValueError(f"Unknown option id: {next(iter(option_ids - found))}")
+
+    if any(len(row) > 1 for row in question_rows):
+        await session.execute(update(Question), [row for row in question_rows if len(row) > 1])
+    if any(len(row) > 1 for row in option_rows):
+        await session.execute(update(Option), [row for row in option_rows if len(row) > 1])
+    await bump_data_version(session, survey_id)
+    await bump_survey_version(session, survey_id)
+    await snapshot_published_version(session, survey_id)
+    await session.commit()
+    invalidate_survey(survey_id)
+    return await _load_survey(session, survey_id)
 
 
 async def add_option_to_question(
@@ -187,11 +422,82 @@ async def add_option_to_question(
 ) -> Option:
     option = Option(question_id=question_id, text=text, order=order)
     session.add(option)
+    survey_id = await bump_data_version_for_question(session, question_id)
+    if survey_id is not None:
+        await bump_survey_version(session, survey_id)
+        await snapshot_published_version(session, survey_id)
     await session.commit()
+    if survey_id is not None:
+        invalidate_survey(survey_id)
     await session.refresh(option)
     return option
 
 
+@dataclass
+class ResponseSubmission:
+    survey_id: UUID
+    answers: List[AnswerValueSubmit]
+    user_id: Optional[UUID] = None
+    session_id: Optional[str] = None
+    meta: Optional[dict] = None
+    survey_version: Optional[int] = None
+
+
+async def insert_responses(
+    session: AsyncSession,
+    submissions: List[ResponseSubmission],
+) -> List[Optional[Response]]:
+    response_rows = []
+    value_rows: dict[UUID, list] = defaultdict(list)
+    option_rows: dict[UUID, list] = defaultdict(list)
+    for submission in submissions:
+        response_id = uuid4()
+        response_rows.append(
+            {
+                "id": response_id,
+                "survey_id": submission.survey_id,
+                "user_id": submission.user_id,
+                "session_id": submission.session_id,
+                "meta": submission.meta,
+                "survey_version": submission.survey_version,
+            }
+        )
+        for answer in submission.answers:
+            answer_value_id = uuid4()
+            value_rows[response_id].append(
+                {
+                    "id": answer_value_id,
+                    "response_id": response_id,
+                    "question_id": answer.question_id,
+                    "value_text": answer.value_text,
+                    "value_number": answer.value_number,
+                }
+            )
+            for opt_id in answer.option_ids or []:
+                option_rows[response_id].append(
+                    {"id": uuid4(), "answer_value_id": answer_value_id, "option_id": opt_id}
+                )
+
+    # The partial unique indexes on (survey_id, user_id) and (survey_id, session_id)
+    # make a repeat submission a no-op; it simply does not come back from RETURNING.
+    result = await session.execute(
+        pg_insert(Response).on_conflict_do_nothing().returning(Response),
+        response_rows,
+    )
+    inserted = {response.id: response for response in result.scalars()}
+    responses = [inserted.get(row["id"]) for row in response_rows]
+
+    answer_sets: dict[UUID, list] = defaultdict(list)
+    for submission, response in zip(submissions, responses):
+        if response is not None:
+            answer_sets[submission.survey_id].append(submission.answers)
+    await _insert_many(session, AnswerValue, [row for rid in inserted for row in value_rows[rid]])
+    await _insert_many(session, AnswerOption, [row for rid in inserted for row in option_rows[rid]])
+    for survey_id, survey_answer_sets in answer_sets.items():
+        await record_responses(session, survey_id, survey_answer_sets)
+    return responses
+
+
 async def submit_response(
     session: AsyncSession,
     survey_id: UUID,
@@ -199,36 +505,40 @@ async def submit_response(
     answers: List[AnswerValueSubmit],
     meta: Optional[dict] = None,
     session_id: Optional[str] = None,
-) -> Response:
-    response = Response(
+    survey_version: Optional[int] = None,
+) -> Optional[Response]:
+    submission = ResponseSubmission(
         survey_id=survey_id,
+        answers=answers,
         user_id=user_id,
         session_id=session_id,
-        meta=meta
+        meta=meta,
+        survey_version=survey_version,
     )
-    session.add(response)
-    await session.flush()
-
-    for answer in answers:
-        av = AnswerValue(
-            response_id=response.id,
-            question_id=answer.question_id,
-            value_text=answer.value_text,
-            value_number=answer.value_number,
-        )
-        session.add(av)
-        await session.flush()
-        if answer.option_ids:
-            for opt_id in answer.option_ids:
-                session.add(
-                    AnswerOption(
-                        answer_value_id=av.id,
-                        option_id=opt_id,
-                    )
-                )
-
+    [response] = await insert_responses(session, [submission])
     await session.commit()
-    await session.refresh(response)
     return response
 
 
+async def get_responded_survey_ids(
+    session: AsyncSession,
+    survey_ids: List[UUID],
+    user_id: Optional[UUID],
+    session_id: Optional[str],
+) -> set[UUID]:
+    respondent = []
+    if user_id is not None:
+        respondent.append(Response.user_id == user_id)
+    if session_id is not None:
+        respondent.append(Response.session_id == session_id)
+    if not survey_ids or not respondent:
+        return set()
+    result = await session.execute(
+        select(Response.survey_id)
+        .where(
+            Response.survey_id.in_(survey_ids),
+            or_(*respondent),
+        )
+        .distinct()
+    )
+    return set(result.scalars())
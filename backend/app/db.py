@@ -5,6 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from app.core.config import settings
 
 
+MAX_BIND_PARAMS = 32767
+
 engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
 
 async_session_maker = async_sessionmaker(
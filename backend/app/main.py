@@ -4,6 +4,7 @@ import sys
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.admission import AdmissionMiddleware
 from app.core.config import settings
 
 
@@ -13,6 +14,8 @@ def get_application() -> FastAPI:
         version="0.1.0",
     )
 
+    # Added before CORS so that CORS wraps it and 503s still carry CORS headers.
+    app.add_middleware(AdmissionMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -42,6 +45,23 @@ def get_application() -> FastAPI:
         except Exception as e:
             print(f"Warning: Could not run migrations: {e}", file=sys.stderr)
 
+        from app.services.refresh_tokens import revocations
+
+        revocations.start()
+
+        if settings.SUBMIT_BUFFER_ENABLED:
+            from app.services.submit_buffer import submission_buffer
+
+            submission_buffer.start()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        from app.services.refresh_tokens import revocations
+        from app.services.submit_buffer import submission_buffer
+
+        await submission_buffer.stop()
+        await revocations.stop()
+
     return app
 
 
@@ -2,16 +2,19 @@ import enum
 import uuid
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import declarative_base, relationship
@@ -32,6 +35,12 @@ class QuestionType(str, enum.Enum):
     text = "text"
 
 
+class RollupGranularity(str, enum.Enum):
+    minute = "minute"
+    hour = "hour"
+    day = "day"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -56,12 +65,28 @@ class Survey(Base):
     is_published = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     settings = Column(JSONB, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    published_version = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_surveys_created_at_id", "created_at", "id"),
+        Index("ix_surveys_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
 
     owner = relationship("User", back_populates="surveys")
     questions = relationship("Question", back_populates="survey", cascade="all, delete-orphan")
     responses = relationship("Response", back_populates="survey", cascade="all, delete-orphan")
 
 
+class SurveyVersion(Base):
+    __tablename__ = "survey_versions"
+
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    document = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Question(Base):
     __tablename__ = "questions"
 
@@ -99,6 +124,25 @@ class Response(Base):
     session_id = Column(String, nullable=True, index=True)  # Для неавторизованных пользователей (cookie-based)
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     meta = Column(JSONB, nullable=True)
+    survey_version = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_responses_survey_id_submitted_at_id", "survey_id", "submitted_at", "id"),
+        Index(
+            "uq_responses_survey_id_user_id",
+            "survey_id",
+            "user_id",
+            unique=True,
+            postgresql_where=text("user_id IS NOT NULL"),
+        ),
+        Index(
+            "uq_responses_survey_id_session_id",
+            "survey_id",
+            "session_id",
+            unique=True,
+            postgresql_where=text("session_id IS NOT NULL"),
+        ),
+    )
 
     survey = relationship("Survey", back_populates="responses")
     user = relationship("User", back_populates="responses")
@@ -130,3 +174,87 @@ class AnswerOption(Base):
     option = relationship("Option", back_populates="answer_options")
 
 
+
+
+class SurveyCounter(Base):
+    __tablename__ = "survey_counters"
+
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True)
+    response_count = Column(Integer, nullable=False, default=0)
+    data_version = Column(BigInteger, nullable=False, default=0)
+
+
+class QuestionCounter(Base):
+    __tablename__ = "question_counters"
+
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False, index=True)
+    value_count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+    value_sq_sum = Column(Float, nullable=False, default=0.0)
+    text_count = Column(Integer, nullable=False, default=0)
+
+
+class OptionCounter(Base):
+    __tablename__ = "option_counters"
+
+    option_id = Column(UUID(as_uuid=True), ForeignKey("options.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ScaleBucketCounter(Base):
+    __tablename__ = "scale_bucket_counters"
+
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    value = Column(Float, primary_key=True)
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ResponseRollup(Base):
+    __tablename__ = "response_rollups"
+
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(Enum(RollupGranularity), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class OptionRollup(Base):
+    __tablename__ = "option_rollups"
+
+    option_id = Column(UUID(as_uuid=True), ForeignKey("options.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(Enum(RollupGranularity), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_option_rollups_question_id_granularity_bucket_start", "question_id", "granularity", "bucket_start"),
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    survey_id = Column(UUID(as_uuid=True), ForeignKey("surveys.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    session_id = Column(String, nullable=True)
+    response = Column(JSONB, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    jti = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    issued_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
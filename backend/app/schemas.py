@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
-from app.models import QuestionType, UserRole
+from app.models import QuestionType, RollupGranularity, UserRole
 
 
 class UserBase(BaseModel):
@@ -42,6 +42,12 @@ class TokenPayload(BaseModel):
     sub: str
     exp: int
     type: str
+    jti: Optional[str] = None
+    fam: Optional[str] = None
+    email: Optional[str] = None
+    name: Optional[str] = None
+    role: Optional[UserRole] = None
+    created: Optional[datetime] = None
 
 
 class OptionBase(BaseModel):
@@ -72,6 +78,12 @@ class QuestionCreate(QuestionBase):
     options: Optional[List[OptionCreate]] = None
 
 
+def _not_null(value):
+    if value is None:
+        raise ValueError("may be omitted but not null")
+    return value
+
+
 class QuestionUpdate(BaseModel):
     text: Optional[str] = None
     type: Optional[QuestionType] = None
@@ -79,6 +91,20 @@ class QuestionUpdate(BaseModel):
     order: Optional[int] = None
     meta: Optional[dict] = None
 
+    _columns_not_null = field_validator("text", "type", "required", "order")(_not_null)
+
+
+class QuestionPatch(QuestionUpdate):
+    id: UUID
+
+
+class OptionPatch(BaseModel):
+    id: UUID
+    text: Optional[str] = None
+    order: Optional[int] = None
+
+    _columns_not_null = field_validator("text", "order")(_not_null)
+
 
 class QuestionRead(QuestionBase):
     id: UUID
@@ -110,12 +136,47 @@ class SurveyRead(SurveyBase):
     owner_id: UUID
     is_published: bool
     created_at: datetime
+    version: int = 1
     questions: List[QuestionRead] = []
+    has_responded: Optional[bool] = None
 
     class Config:
         from_attributes = True
 
 
+class SurveyClone(BaseModel):
+    title: Optional[str] = None
+
+
+class SurveyStructurePatch(BaseModel):
+    questions: List[QuestionPatch] = []
+    options: List[OptionPatch] = []
+
+
+class SurveySummary(BaseModel):
+    id: UUID
+    title: str
+    description: str
+    owner_id: UUID
+    is_published: bool
+    created_at: datetime
+    version: int
+    question_count: int
+    response_count: int
+    has_responded: Optional[bool] = None
+
+
+class SurveySummaryPage(BaseModel):
+    items: List[SurveySummary]
+    next_cursor: Optional[str] = None
+
+
+class SurveyVersionInfo(BaseModel):
+    version: int
+    created_at: datetime
+    response_count: int
+
+
 class AnswerValueSubmit(BaseModel):
     question_id: UUID
     value_text: Optional[str] = None
@@ -128,12 +189,38 @@ class SubmitResponsePayload(BaseModel):
     answers: List[AnswerValueSubmit]
 
 
+class ResponseImportRow(BaseModel):
+    submitted_at: Optional[datetime] = None
+    meta: Optional[dict] = None
+    answers: List[AnswerValueSubmit]
+
+
+class BatchIngestError(BaseModel):
+    row: int
+    errors: List[dict]
+
+
+class BatchIngestResult(BaseModel):
+    accepted: int
+    rejected: int
+    errors: List[BatchIngestError]
+
+
+class RespondedCheckRequest(BaseModel):
+    survey_ids: List[UUID] = Field(max_length=500)
+
+
+class RespondedCheck(BaseModel):
+    responded: Dict[UUID, bool]
+
+
 class ResponseRead(BaseModel):
     id: UUID
     survey_id: UUID
     user_id: Optional[UUID]
     submitted_at: datetime
     meta: Optional[dict]
+    survey_version: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -152,6 +239,30 @@ class TextResponse(BaseModel):
     created_at: Optional[datetime] = None
 
 
+class TextResponsePage(BaseModel):
+    items: List[TextResponse]
+    next_cursor: Optional[str] = None
+
+
+class HistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class ScaleStats(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    stddev: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    median: Optional[float] = None
+    p25: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+    buckets: List[HistogramBucket] = []
+
+
 class QuestionAnalytics(BaseModel):
     question_id: UUID
     type: QuestionType
@@ -159,6 +270,7 @@ class QuestionAnalytics(BaseModel):
     options: Optional[List[OptionStats]] = None
     histogram: Optional[dict] = None
     avg: Optional[float] = None
+    stats: Optional[ScaleStats] = None
     text_responses: Optional[List[TextResponse]] = None
 
 
@@ -168,3 +280,47 @@ class SurveyAnalytics(BaseModel):
     questions: List[QuestionAnalytics]
 
 
+
+
+class AnswerFilter(BaseModel):
+    question_id: UUID
+    option_ids: List[UUID] = Field(min_length=1)
+
+
+class SegmentedAnalyticsRequest(BaseModel):
+    filters: List[AnswerFilter] = []
+    breakdown_question_id: Optional[UUID] = None
+    question_ids: Optional[List[UUID]] = None
+
+
+class AnalyticsSegment(BaseModel):
+    option_id: Optional[UUID] = None
+    text: Optional[str] = None
+    total_responses: int
+    questions: List[QuestionAnalytics]
+
+
+class SegmentedAnalytics(BaseModel):
+    survey_id: UUID
+    breakdown_question_id: Optional[UUID] = None
+    segments: List[AnalyticsSegment]
+
+
+class TimeSeriesPoint(BaseModel):
+    bucket_start: datetime
+    count: int
+    share: Optional[float] = None
+
+
+class OptionTimeSeries(BaseModel):
+    option_id: UUID
+    text: str
+    points: List[TimeSeriesPoint]
+
+
+class ResponseTimeSeries(BaseModel):
+    survey_id: UUID
+    granularity: RollupGranularity
+    question_id: Optional[UUID] = None
+    points: List[TimeSeriesPoint]
+    options: Optional[List[OptionTimeSeries]] = None
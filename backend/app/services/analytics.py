@@ -1,103 +1,429 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Column,
+    Float,
+    MetaData,
+    Table,
+    and_,
+    case,
+    cast,
+    exists,
+    func,
+    insert,
+    null,
+    select,
+    text,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import AnswerOption, AnswerValue, Option, Question, QuestionType, Response
-from app.schemas import OptionStats, QuestionAnalytics, SurveyAnalytics
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.db import async_session_maker
+from app.models import (
+    AnswerOption,
+    AnswerValue,
+    Option,
+    OptionCounter,
+    OptionRollup,
+    Question,
+    QuestionCounter,
+    QuestionType,
+    Response,
+    ResponseRollup,
+    RollupGranularity,
+    ScaleBucketCounter,
+    SurveyCounter,
+)
+from app.schemas import (
+    AnalyticsSegment,
+    HistogramBucket,
+    OptionStats,
+    OptionTimeSeries,
+    QuestionAnalytics,
+    ResponseTimeSeries,
+    ScaleStats,
+    SegmentedAnalytics,
+    SegmentedAnalyticsRequest,
+    SurveyAnalytics,
+    TextResponse,
+    TimeSeriesPoint,
+)
 
 
-async def get_survey_analytics(session: AsyncSession, survey_id: UUID) -> SurveyAnalytics:
-    total_stmt = select(func.count(Response.id)).where(Response.survey_id == survey_id)
-    total_responses = (await session.execute(total_stmt)).scalar_one()
+TEXT_PREVIEW_SIZE = 5
+TEXT_STREAM_BATCH_SIZE = 500
+DEFAULT_HISTOGRAM_BUCKETS = 10
+SCALE_PERCENTILES = [0.25, 0.5, 0.75, 0.9]
+
+_analytics_cache: LRUCache[tuple, bytes] = LRUCache("analytics", settings.ANALYTICS_CACHE_MAX_BYTES, sizeof=len)
+
+_segments_table = Table(
+    "analytics_segments",
+    MetaData(),
+    Column("response_id", PG_UUID(as_uuid=True), nullable=False),
+    Column("segment_id", PG_UUID(as_uuid=True), nullable=True),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+async def _load_option_counts(
+    session: AsyncSession,
+    survey_id: UUID,
+    question_id: Optional[UUID] = None,
+) -> dict[UUID, list[tuple]]:
+    stmt = (
+        select(
+            Option.question_id,
+            Option.id,
+            Option.text,
+            func.coalesce(OptionCounter.count, 0),
+        )
+        .join(Question, Option.question_id == Question.id)
+        .join(OptionCounter, OptionCounter.option_id == Option.id, isouter=True)
+        .where(Question.survey_id == survey_id)
+        .where(Question.type.in_((QuestionType.single, QuestionType.multi)))
+        .order_by(Option.question_id, Option.order)
+    )
+    if question_id is not None:
+        stmt = stmt.where(Option.question_id == question_id)
+    rows_by_question: dict[UUID, list[tuple]] = defaultdict(list)
+    for q_id, opt_id, text, count in (await session.execute(stmt)).all():
+        rows_by_question[q_id].append((opt_id, text, count))
+    return rows_by_question
+
+
+async def _load_scale_histograms(
+    session: AsyncSession,
+    survey_id: UUID,
+    question_id: Optional[UUID] = None,
+) -> dict[UUID, dict[float, int]]:
+    stmt = (
+        select(
+            ScaleBucketCounter.question_id,
+            ScaleBucketCounter.value,
+            ScaleBucketCounter.count,
+        )
+        .join(Question, ScaleBucketCounter.question_id == Question.id)
+        .where(ScaleBucketCounter.survey_id == survey_id)
+        .where(Question.type == QuestionType.scale)
+        .where(ScaleBucketCounter.count > 0)
+        .order_by(ScaleBucketCounter.question_id, ScaleBucketCounter.value)
+    )
+    if question_id is not None:
+        stmt = stmt.where(ScaleBucketCounter.question_id == question_id)
+    histograms: dict[UUID, dict[float, int]] = defaultdict(dict)
+    for q_id, value, count in (await session.execute(stmt)).all():
+        histograms[q_id][value] = count
+    return histograms
+
+
+def _scale_stats_stmt(weighted, keys: list[str], buckets: int):
+    # Statistics over (value, count) rows, so the cost follows the number of distinct
+    # values rather than the number of answers. Percentiles use percentile_cont's
+    # interpolation at position p * (n - 1), located through cumulative counts.
+    partition = [weighted.c[k] for k in keys]
+    ranked = select(
+        *partition,
+        weighted.c.value,
+        weighted.c.count,
+        func.sum(weighted.c.count).over(partition_by=partition, order_by=weighted.c.value).label("cum"),
+        func.sum(weighted.c.count).over(partition_by=partition).label("n"),
+        func.min(weighted.c.value).over(partition_by=partition).label("lo"),
+        func.max(weighted.c.value).over(partition_by=partition).label("hi"),
+    ).cte("scale_ranked")
+
+    n = ranked.c.n
+    total = func.sum(ranked.c.value * ranked.c.count)
+    sq_total = func.sum(ranked.c.count * ranked.c.value * ranked.c.value)
+    percentiles = []
+    for fraction in SCALE_PERCENTILES:
+        position = cast(n - 1, Float) * fraction
+        lower = func.min(ranked.c.value).filter(ranked.c.cum > func.floor(position))
+        upper = func.min(ranked.c.value).filter(ranked.c.cum > func.ceil(position))
+        percentiles.append(lower + (upper - lower) * (position - func.floor(position)))
+    stats = (
+        select(
+            *[ranked.c[k] for k in keys],
+            n.label("count"),
+            (total / n).label("mean"),
+            case(
+                (n > 1, func.sqrt(func.greatest((sq_total - total * total / n) / (n - 1), 0))),
+                else_=null(),
+            ).label("stddev"),
+            ranked.c.lo.label("min"),
+            ranked.c.hi.label("max"),
+            *[p.label(f"p{i}") for i, p in enumerate(percentiles)],
+            func.array_agg(aggregate_order_by(ranked.c.value, ranked.c.value)).label("scale_values"),
+            func.array_agg(aggregate_order_by(ranked.c.count, ranked.c.value)).label("value_counts"),
+        )
+        .group_by(*[ranked.c[k] for k in keys], n, ranked.c.lo, ranked.c.hi)
+        .cte("scale_stats")
+    )
+
+    bucket = case(
+        (ranked.c.hi == ranked.c.lo, 1),
+        else_=func.least(func.width_bucket(ranked.c.value, ranked.c.lo, ranked.c.hi, buckets), buckets),
+    ).label("bucket")
+    histogram = (
+        select(*[ranked.c[k] for k in keys], bucket, func.sum(ranked.c.count).label("count"))
+        .group_by(*[ranked.c[k] for k in keys], bucket)
+        .cte("scale_histogram")
+    )
+
+    return (
+        select(
+            stats,
+            func.array_agg(aggregate_order_by(histogram.c.bucket, histogram.c.bucket)),
+            func.array_agg(aggregate_order_by(histogram.c["count"], histogram.c.bucket)),
+        )
+        .join(histogram, and_(*[histogram.c[k].is_not_distinct_from(stats.c[k]) for k in keys]))
+        .group_by(*stats.c)
+    )
+
+
+def _scale_stats_from_row(row, buckets: int) -> ScaleStats:
+    count, mean, stddev, min_value, max_value, p25, median, p75, p90, _, _, bucket_ids, bucket_counts = row
+    counts = dict(zip(bucket_ids, bucket_counts))
+    if max_value == min_value:
+        edges = [(min_value, max_value)]
+    else:
+        width = (max_value - min_value) / buckets
+        edges = [(min_value + i * width, min_value + (i + 1) * width) for i in range(buckets)]
+    return ScaleStats(
+        count=count,
+        mean=mean,
+        stddev=stddev,
+        min=min_value,
+        max=max_value,
+        median=median,
+        p25=p25,
+        p75=p75,
+        p90=p90,
+        buckets=[
+            HistogramBucket(lower=lower, upper=upper, count=counts.get(i + 1, 0))
+            for i, (lower, upper) in enumerate(edges)
+        ],
+    )
+
+
+async def _load_scale_stats(
+    session: AsyncSession,
+    survey_id: UUID,
+    buckets: int,
+    question_id: Optional[UUID] = None,
+) -> dict[UUID, ScaleStats]:
+    weighted = (
+        select(
+            ScaleBucketCounter.question_id.label("question_id"),
+            ScaleBucketCounter.value.label("value"),
+            ScaleBucketCounter.count.label("count"),
+        )
+        .join(Question, ScaleBucketCounter.question_id == Question.id)
+        .where(ScaleBucketCounter.survey_id == survey_id)
+        .where(Question.type == QuestionType.scale)
+        .where(ScaleBucketCounter.count > 0)
+    )
+    if question_id is not None:
+        weighted = weighted.where(ScaleBucketCounter.question_id == question_id)
+    stmt = _scale_stats_stmt(weighted.cte("scale_counts"), ["question_id"], buckets)
+    return {row[0]: _scale_stats_from_row(row[1:], buckets) for row in (await session.execute(stmt)).all()}
+
+
+async def _load_text_counts(
+    session: AsyncSession,
+    survey_id: UUID,
+    question_id: Optional[UUID] = None,
+) -> dict[UUID, int]:
+    stmt = select(QuestionCounter.question_id, QuestionCounter.text_count).where(
+        QuestionCounter.survey_id == survey_id
+    )
+    if question_id is not None:
+        stmt = stmt.where(QuestionCounter.question_id == question_id)
+    return {q_id: count for q_id, count in (await session.execute(stmt)).all()}
+
+
+async def _load_text_previews(
+    session: AsyncSession,
+    survey_id: UUID,
+    question_id: Optional[UUID] = None,
+) -> dict[UUID, list[TextResponse]]:
+    preview = (
+        select(
+            AnswerValue.response_id,
+            AnswerValue.value_text,
+            Response.submitted_at,
+        )
+        .join(Response, AnswerValue.response_id == Response.id)
+        .where(AnswerValue.question_id == Question.id)
+        .where(AnswerValue.value_text.isnot(None))
+        .order_by(Response.submitted_at.desc(), AnswerValue.response_id.desc())
+        .limit(TEXT_PREVIEW_SIZE)
+        .lateral("preview")
+    )
+    stmt = (
+        select(
+            Question.id,
+            preview.c.response_id,
+            preview.c.value_text,
+            preview.c.submitted_at,
+        )
+        .join(preview, true())
+        .where(Question.survey_id == survey_id)
+        .where(Question.type == QuestionType.text)
+        .order_by(Question.id, preview.c.submitted_at.desc(), preview.c.response_id.desc())
+    )
+    if question_id is not None:
+        stmt = stmt.where(Question.id == question_id)
+    text_by_question: dict[UUID, list[TextResponse]] = defaultdict(list)
+    for q_id, response_id, text, submitted_at in (await session.execute(stmt)).all():
+        text_by_question[q_id].append(
+            TextResponse(
+                response_id=response_id,
+                text=text or "",
+                created_at=submitted_at,
+            )
+        )
+    return text_by_question
+
+
+async def iter_text_responses(
+    survey_id: UUID,
+    question_id: UUID,
+    after: Optional[tuple[datetime, UUID]],
+    limit: int,
+) -> AsyncIterator[bytes]:
+    stmt = (
+        select(
+            AnswerValue.response_id,
+            AnswerValue.value_text,
+            Response.submitted_at,
+        )
+        .join(Response, AnswerValue.response_id == Response.id)
+        .where(Response.survey_id == survey_id)
+        .where(AnswerValue.question_id == question_id)
+        .where(AnswerValue.value_text.isnot(None))
+        .order_by(Response.submitted_at.desc(), AnswerValue.response_id.desc())
+        .limit(limit + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(Response.submitted_at, AnswerValue.response_id) < tuple_(*after))
+
+    yield b'{"items":['
+    emitted = 0
+    last = None
+    has_more = False
+    async with async_session_maker() as session:
+        result = await session.stream(stmt.execution_options(yield_per=TEXT_STREAM_BATCH_SIZE))
+        async for response_id, text, submitted_at in result:
+            if emitted == limit:
+                has_more = True
+                break
+            if emitted:
+                yield b","
+            yield TextResponse(response_id=response_id, text=text or "", created_at=submitted_at).model_dump_json().encode()
+            emitted += 1
+            last = (submitted_at, response_id)
+        await result.close()
+
+    next_cursor = encode_cursor(*last) if has_more and last is not None else None
+    yield b'],"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
+
+
+def _build_choice_analytics(q: Question, rows: list[tuple]) -> QuestionAnalytics:
+    total_for_question = sum(r[2] for r in rows) or 1
+    option_stats = [
+        OptionStats(
+            option_id=opt_id,
+            text=text,
+            count=count,
+            percentage=(count / total_for_question) * 100.0 if total_for_question else 0.0,
+        )
+        for opt_id, text, count in rows
+    ]
+    return QuestionAnalytics(
+        question_id=q.id,
+        type=q.type,
+        total_responses=total_for_question,
+        options=option_stats,
+    )
+
+
+def _build_scale_analytics(
+    q: Question,
+    histogram: dict[float, int],
+    stats: Optional[ScaleStats],
+) -> QuestionAnalytics:
+    total_for_question = sum(histogram.values())
+    avg = None
+    if total_for_question:
+        avg = sum(value * count for value, count in histogram.items()) / total_for_question
+    return QuestionAnalytics(
+        question_id=q.id,
+        type=q.type,
+        total_responses=total_for_question,
+        histogram=histogram,
+        avg=avg,
+        stats=stats,
+    )
+
+
+def _build_text_analytics(q: Question, text_count: int, preview: list[TextResponse]) -> QuestionAnalytics:
+    return QuestionAnalytics(
+        question_id=q.id,
+        type=q.type,
+        total_responses=text_count,
+        text_responses=preview,
+    )
+
+
+async def get_survey_analytics(
+    session: AsyncSession,
+    survey_id: UUID,
+    histogram_buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+) -> SurveyAnalytics:
+    total_stmt = select(SurveyCounter.response_count).where(SurveyCounter.survey_id == survey_id)
+    total_responses = (await session.execute(total_stmt)).scalar_one_or_none() or 0
 
     questions = (
         await session.execute(select(Question).where(Question.survey_id == survey_id).order_by(Question.order))
     ).scalars().all()
 
-    question_analytics: list[QuestionAnalytics] = []
+    question_types = {q.type for q in questions}
+    option_counts = {}
+    histograms = {}
+    scale_stats = {}
+    text_counts = {}
+    text_previews = {}
+    if question_types & {QuestionType.single, QuestionType.multi}:
+        option_counts = await _load_option_counts(session, survey_id)
+    if QuestionType.scale in question_types:
+        histograms = await _load_scale_histograms(session, survey_id)
+        scale_stats = await _load_scale_stats(session, survey_id, histogram_buckets)
+    if QuestionType.text in question_types:
+        text_counts = await _load_text_counts(session, survey_id)
+        text_previews = await _load_text_previews(session, survey_id)
 
+    question_analytics: list[QuestionAnalytics] = []
     for q in questions:
         if q.type in (QuestionType.single, QuestionType.multi):
-            stmt = (
-                select(
-                    Option.id,
-                    Option.text,
-                    func.count(AnswerOption.id),
-                )
-                .join(AnswerOption, AnswerOption.option_id == Option.id, isouter=True)
-                .where(Option.question_id == q.id)
-                .group_by(Option.id, Option.text)
-            )
-            rows = (await session.execute(stmt)).all()
-            option_stats: list[OptionStats] = []
-            total_for_question = sum(r[2] for r in rows) or 1
-            for opt_id, text, count in rows:
-                option_stats.append(
-                    OptionStats(
-                        option_id=opt_id,
-                        text=text,
-                        count=count,
-                        percentage=(count / total_for_question) * 100.0 if total_for_question else 0.0,
-                    )
-                )
-            question_analytics.append(
-                QuestionAnalytics(
-                    question_id=q.id,
-                    type=q.type,
-                    total_responses=total_for_question,
-                    options=option_stats,
-                )
-            )
+            question_analytics.append(_build_choice_analytics(q, option_counts.get(q.id, [])))
         elif q.type == QuestionType.scale:
-            values_stmt = select(AnswerValue.value_number).where(AnswerValue.question_id == q.id)
-            values = [v[0] for v in (await session.execute(values_stmt)).all() if v[0] is not None]
-            total_for_question = len(values)
-            histogram: dict[float, int] = {}
-            avg = None
-            if values:
-                for v in values:
-                    histogram[v] = histogram.get(v, 0) + 1
-                avg = sum(values) / len(values)
             question_analytics.append(
-                QuestionAnalytics(
-                    question_id=q.id,
-                    type=q.type,
-                    total_responses=total_for_question,
-                    histogram=histogram,
-                    avg=avg,
-                )
+                _build_scale_analytics(q, histograms.get(q.id, {}), scale_stats.get(q.id))
             )
         else:
-            text_stmt = (
-                select(
-                    AnswerValue.response_id,
-                    AnswerValue.value_text,
-                    Response.submitted_at,
-                )
-                .join(Response, AnswerValue.response_id == Response.id)
-                .where(AnswerValue.question_id == q.id)
-                .where(AnswerValue.value_text.isnot(None))
-                .order_by(Response.submitted_at.desc())
-            )
-            text_rows = (await session.execute(text_stmt)).all()
-            total_for_question = len(text_rows)
-            from app.schemas import TextResponse
-            text_responses = [
-                TextResponse(
-                    response_id=row[0],
-                    text=row[1] or "",
-                    created_at=row[2],
-                )
-                for row in text_rows
-            ]
             question_analytics.append(
-                QuestionAnalytics(
-                    question_id=q.id,
-                    type=q.type,
-                    total_responses=total_for_question,
-                    text_responses=text_responses,
-                )
+                _build_text_analytics(q, text_counts.get(q.id, 0), text_previews.get(q.id, []))
             )
 
     return SurveyAnalytics(
@@ -111,11 +437,325 @@ async def get_question_analytics(
     session: AsyncSession,
     survey_id: UUID,
     question_id: UUID,
-) -> QuestionAnalytics:
-    survey_analytics = await get_survey_analytics(session, survey_id)
-    for q in survey_analytics.questions:
-        if q.question_id == question_id:
-            return q
-    raise ValueError("Question not found in analytics")
+    histogram_buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+) -> Optional[QuestionAnalytics]:
+    q = (
+        await session.execute(
+            select(Question).where(Question.id == question_id, Question.survey_id == survey_id)
+        )
+    ).scalar_one_or_none()
+    if q is None:
+        return None
+
+    if q.type in (QuestionType.single, QuestionType.multi):
+        option_counts = await _load_option_counts(session, survey_id, q.id)
+        return _build_choice_analytics(q, option_counts.get(q.id, []))
+    if q.type == QuestionType.scale:
+        histograms = await _load_scale_histograms(session, survey_id, q.id)
+        scale_stats = await _load_scale_stats(session, survey_id, histogram_buckets, q.id)
+        return _build_scale_analytics(q, histograms.get(q.id, {}), scale_stats.get(q.id))
+    text_counts = await _load_text_counts(session, survey_id, q.id)
+    text_previews = await _load_text_previews(session, survey_id, q.id)
+    return _build_text_analytics(q, text_counts.get(q.id, 0), text_previews.get(q.id, []))
+
+
+async def get_survey_analytics_json(
+    session: AsyncSession,
+    survey_id: UUID,
+    data_version: int,
+    histogram_buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+) -> bytes:
+    key = (survey_id, data_version, None, histogram_buckets)
+    payload = _analytics_cache.get(key)
+    if payload is None:
+        analytics = await get_survey_analytics(session, survey_id, histogram_buckets)
+        payload = analytics.model_dump_json().encode()
+        _analytics_cache.set(key, payload)
+    return payload
+
+
+async def get_question_analytics_json(
+    session: AsyncSession,
+    survey_id: UUID,
+    question_id: UUID,
+    data_version: int,
+    histogram_buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+) -> Optional[bytes]:
+    key = (survey_id, data_version, question_id, histogram_buckets)
+    payload = _analytics_cache.get(key)
+    if payload is None:
+        analytics = await get_question_analytics(session, survey_id, question_id, histogram_buckets)
+        if analytics is None:
+            return None
+        payload = analytics.model_dump_json().encode()
+        _analytics_cache.set(key, payload)
+    return payload
+
+
+async def get_segmented_analytics(
+    session: AsyncSession,
+    survey_id: UUID,
+    request: SegmentedAnalyticsRequest,
+    histogram_buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+) -> SegmentedAnalytics:
+    questions = (
+        await session.execute(select(Question).where(Question.survey_id == survey_id).order_by(Question.order))
+    ).scalars().all()
+    questions_by_id = {q.id: q for q in questions}
+    choice_types = (QuestionType.single, QuestionType.multi)
+
+    for answer_filter in request.filters:
+        q = questions_by_id.get(answer_filter.question_id)
+        if q is None or q.type not in choice_types:
+            raise ValueError(f"Filter question {answer_filter.question_id} is not a choice question of this survey")
+    breakdown = None
+    if request.breakdown_question_id is not None:
+        breakdown = questions_by_id.get(request.breakdown_question_id)
+        if breakdown is None or breakdown.type not in choice_types:
+            raise ValueError("Breakdown question is not a choice question of this survey")
+
+    targets = [
+        q
+        for q in questions
+        if q.type != QuestionType.text and (request.question_ids is None or q.id in request.question_ids)
+    ]
+    choice_ids = [q.id for q in targets if q.type in choice_types]
+    scale_ids = [q.id for q in targets if q.type == QuestionType.scale]
+
+    respondents = select(Response.id.label("response_id")).where(Response.survey_id == survey_id)
+    for answer_filter in request.filters:
+        respondents = respondents.where(
+            exists().where(
+                AnswerValue.response_id == Response.id,
+                AnswerValue.question_id == answer_filter.question_id,
+                AnswerOption.answer_value_id == AnswerValue.id,
+                AnswerOption.option_id.in_(answer_filter.option_ids),
+            )
+        )
+    respondents = respondents.cte("respondents")
+
+    if breakdown is not None:
+        membership = (
+            select(respondents.c.response_id, AnswerOption.option_id)
+            .join(AnswerValue, AnswerValue.response_id == respondents.c.response_id)
+            .join(AnswerOption, AnswerOption.answer_value_id == AnswerValue.id)
+            .where(AnswerValue.question_id == breakdown.id)
+        )
+    else:
+        membership = select(respondents.c.response_id, cast(null(), PG_UUID(as_uuid=True)))
+
+    # Materialize segment membership once; every aggregation below joins the
+    # temp table instead of re-evaluating the filter and breakdown joins.
+    connection = await session.connection()
+    await connection.run_sync(_segments_table.create)
+    await session.execute(insert(_segments_table).from_select(["response_id", "segment_id"], membership))
+    await session.execute(text(f"ANALYZE {_segments_table.name}"))
+    segments = _segments_table
+
+    totals_stmt = select(
+        segments.c.segment_id,
+        func.count(func.distinct(segments.c.response_id)),
+    ).group_by(segments.c.segment_id)
+    totals = {segment_id: count for segment_id, count in (await session.execute(totals_stmt)).all()}
+
+    option_counts: dict[tuple, int] = {}
+    if choice_ids:
+        option_stmt = (
+            select(segments.c.segment_id, AnswerOption.option_id, func.count())
+            .join(AnswerValue, AnswerValue.response_id == segments.c.response_id)
+            .join(AnswerOption, AnswerOption.answer_value_id == AnswerValue.id)
+            .where(AnswerValue.question_id.in_(choice_ids))
+            .group_by(segments.c.segment_id, AnswerOption.option_id)
+        )
+        for segment_id, opt_id, count in (await session.execute(option_stmt)).all():
+            option_counts[(segment_id, opt_id)] = count
 
+    histograms: dict[tuple, dict[float, int]] = {}
+    scale_stats: dict[tuple, ScaleStats] = {}
+    if scale_ids:
+        weighted = (
+            select(
+                segments.c.segment_id.label("segment_id"),
+                AnswerValue.question_id.label("question_id"),
+                AnswerValue.value_number.label("value"),
+                func.count().label("count"),
+            )
+            .join(AnswerValue, AnswerValue.response_id == segments.c.response_id)
+            .where(AnswerValue.question_id.in_(scale_ids))
+            .where(AnswerValue.value_number.isnot(None))
+            .group_by(segments.c.segment_id, AnswerValue.question_id, AnswerValue.value_number)
+            .cte("segment_scale_counts")
+        )
+        stats_stmt = _scale_stats_stmt(weighted, ["segment_id", "question_id"], histogram_buckets)
+        for row in (await session.execute(stats_stmt)).all():
+            key = (row[0], row[1])
+            histograms[key] = dict(zip(row[11], row[12]))
+            scale_stats[key] = _scale_stats_from_row(row[2:], histogram_buckets)
+
+    await connection.run_sync(_segments_table.drop)
+
+    options: dict[UUID, list[tuple]] = defaultdict(list)
+    option_question_ids = choice_ids + ([breakdown.id] if breakdown is not None else [])
+    if option_question_ids:
+        options_stmt = (
+            select(Option.question_id, Option.id, Option.text)
+            .where(Option.question_id.in_(option_question_ids))
+            .order_by(Option.question_id, Option.order)
+        )
+        for q_id, opt_id, text in (await session.execute(options_stmt)).all():
+            options[q_id].append((opt_id, text))
+
+    if breakdown is not None:
+        segment_keys = options[breakdown.id]
+    else:
+        segment_keys = [(None, None)]
+
+    result_segments = []
+    for segment_id, segment_text in segment_keys:
+        question_analytics = []
+        for q in targets:
+            if q.type in choice_types:
+                rows = [
+                    (opt_id, text, option_counts.get((segment_id, opt_id), 0))
+                    for opt_id, text in options[q.id]
+                ]
+                question_analytics.append(_build_choice_analytics(q, rows))
+            else:
+                question_analytics.append(
+                    _build_scale_analytics(
+                        q,
+                        histograms.get((segment_id, q.id), {}),
+                        scale_stats.get((segment_id, q.id)),
+                    )
+                )
+        result_segments.append(
+            AnalyticsSegment(
+                option_id=segment_id,
+                text=segment_text,
+                total_responses=totals.get(segment_id, 0),
+                questions=question_analytics,
+            )
+        )
+
+    return SegmentedAnalytics(
+        survey_id=survey_id,
+        breakdown_question_id=breakdown.id if breakdown is not None else None,
+        segments=result_segments,
+    )
+
+
+async def get_segmented_analytics_json(
+    session: AsyncSession,
+    survey_id: UUID,
+    data_version: int,
+    request: SegmentedAnalyticsRequest,
+    histogram_buckets: int = DEFAULT_HISTOGRAM_BUCKETS,
+) -> bytes:
+    key = (survey_id, data_version, "segments", request.model_dump_json(), histogram_buckets)
+    payload = _analytics_cache.get(key)
+    if payload is None:
+        analytics = await get_segmented_analytics(session, survey_id, request, histogram_buckets)
+        payload = analytics.model_dump_json().encode()
+        _analytics_cache.set(key, payload)
+    return payload
+
+
+async def get_response_timeseries(
+    session: AsyncSession,
+    survey_id: UUID,
+    granularity: RollupGranularity,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    question_id: Optional[UUID] = None,
+) -> Optional[ResponseTimeSeries]:
+    def in_range(stmt, column):
+        if start is not None:
+            stmt = stmt.where(column >= start)
+        if end is not None:
+            stmt = stmt.where(column < end)
+        return stmt
+
+    options = None
+    if question_id is not None:
+        question_type = (
+            await session.execute(
+                select(Question.type).where(Question.id == question_id, Question.survey_id == survey_id)
+            )
+        ).scalar_one_or_none()
+        if question_type is None:
+            return None
+        if question_type not in (QuestionType.single, QuestionType.multi):
+            raise ValueError("Option shares are only available for choice questions")
+
+        option_rows = (
+            await session.execute(
+                select(Option.id, Option.text).where(Option.question_id == question_id).order_by(Option.order)
+            )
+        ).all()
+        rollup_stmt = in_range(
+            select(OptionRollup.option_id, OptionRollup.bucket_start, OptionRollup.count)
+            .where(OptionRollup.question_id == question_id)
+            .where(OptionRollup.granularity == granularity)
+            .order_by(OptionRollup.bucket_start),
+            OptionRollup.bucket_start,
+        )
+        counts: dict[UUID, list[tuple[datetime, int]]] = defaultdict(list)
+        bucket_totals: dict[datetime, int] = defaultdict(int)
+        for opt_id, bucket_start, count in (await session.execute(rollup_stmt)).all():
+            counts[opt_id].append((bucket_start, count))
+            bucket_totals[bucket_start] += count
+        options = [
+            OptionTimeSeries(
+                option_id=opt_id,
+                text=text,
+                points=[
+                    TimeSeriesPoint(
+                        bucket_start=bucket_start,
+                        count=count,
+                        share=(count / bucket_totals[bucket_start]) * 100.0 if bucket_totals[bucket_start] else 0.0,
+                    )
+                    for bucket_start, count in counts.get(opt_id, [])
+                ],
+            )
+            for opt_id, text in option_rows
+        ]
 
+    stmt = in_range(
+        select(ResponseRollup.bucket_start, ResponseRollup.count)
+        .where(ResponseRollup.survey_id == survey_id)
+        .where(ResponseRollup.granularity == granularity)
+        .order_by(ResponseRollup.bucket_start),
+        ResponseRollup.bucket_start,
+    )
+    points = [
+        TimeSeriesPoint(bucket_start=bucket_start, count=count)
+        for bucket_start, count in (await session.execute(stmt)).all()
+    ]
+
+    return ResponseTimeSeries(
+        survey_id=survey_id,
+        granularity=granularity,
+        question_id=question_id,
+        points=points,
+        options=options,
+    )
+
+
+async def get_response_timeseries_json(
+    session: AsyncSession,
+    survey_id: UUID,
+    data_version: int,
+    granularity: RollupGranularity,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    question_id: Optional[UUID] = None,
+) -> Optional[bytes]:
+    key = (survey_id, data_version, "timeseries", granularity, start, end, question_id)
+    payload = _analytics_cache.get(key)
+    if payload is None:
+        timeseries = await get_response_timeseries(session, survey_id, granularity, start, end, question_id)
+        if timeseries is None:
+            return None
+        payload = timeseries.model_dump_json().encode()
+        _analytics_cache.set(key, payload)
+    return payload
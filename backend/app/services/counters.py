@@ -0,0 +1,352 @@
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Iterable, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import MAX_BIND_PARAMS
+from app.models import (
+    AnswerOption,
+    AnswerValue,
+    Option,
+    OptionCounter,
+    OptionRollup,
+    Question,
+    QuestionCounter,
+    Response,
+    ResponseRollup,
+    RollupGranularity,
+    ScaleBucketCounter,
+    SurveyCounter,
+)
+from app.schemas import AnswerValueSubmit
+
+
+@dataclass
+class CounterSnapshot:
+    response_count: int = 0
+    options: dict[UUID, int] = field(default_factory=dict)
+    values: dict[UUID, tuple[int, float, float, int]] = field(default_factory=dict)
+    buckets: dict[tuple[UUID, float], int] = field(default_factory=dict)
+
+
+async def _increment(session: AsyncSession, model, rows: list[dict], keys: Sequence[str], columns: Sequence[str]) -> None:
+    if not rows:
+        return
+    rows.sort(key=lambda r: tuple(str(r[k]) for k in keys))
+    chunk_size = max(1, MAX_BIND_PARAMS // (len(rows[0]) + 2))
+    for idx in range(0, len(rows), chunk_size):
+        stmt = pg_insert(model).values(rows[idx:idx + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: model.__table__.c[c] + stmt.excluded[c] for c in columns},
+        )
+        await session.execute(stmt)
+
+
+def _truncate(ts: datetime, granularity: RollupGranularity) -> datetime:
+    ts = ts.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    if granularity in (RollupGranularity.hour, RollupGranularity.day):
+        ts = ts.replace(minute=0)
+    if granularity == RollupGranularity.day:
+        ts = ts.replace(hour=0)
+    return ts
+
+
+def _bucket_start(granularity: RollupGranularity, bucket: Optional[datetime]):
+    if bucket is not None:
+        return bucket
+    return func.date_trunc(granularity.value, func.now(), "UTC")
+
+
+async def record_responses(
+    session: AsyncSession,
+    survey_id: UUID,
+    answer_sets: Iterable[List[AnswerValueSubmit]],
+    submitted_at: Optional[Sequence[datetime]] = None,
+) -> None:
+    response_count = 0
+    option_deltas: dict[tuple[UUID, UUID], int] = defaultdict(int)
+    value_deltas: dict[UUID, list] = defaultdict(lambda: [0, 0.0, 0.0, 0])
+    bucket_deltas: dict[tuple[UUID, float], int] = defaultdict(int)
+    rollup_deltas: dict[tuple, int] = defaultdict(int)
+    option_rollup_deltas: dict[tuple, int] = defaultdict(int)
+
+    times = submitted_at if submitted_at is not None else repeat(None)
+    for answers, ts in zip(answer_sets, times):
+        response_count += 1
+        buckets = [(g, _truncate(ts, g) if ts is not None else None) for g in RollupGranularity]
+        for bucket in buckets:
+            rollup_deltas[bucket] += 1
+        for answer in answers:
+            for opt_id in answer.option_ids or []:
+                option_deltas[(answer.question_id, opt_id)] += 1
+                for bucket in buckets:
+                    option_rollup_deltas[(answer.question_id, opt_id) + bucket] += 1
+            if answer.value_number is not None or answer.value_text is not None:
+                delta = value_deltas[answer.question_id]
+                if answer.value_number is not None:
+                    delta[0] += 1
+                    delta[1] += answer.value_number
+                    delta[2] += answer.value_number * answer.value_number
+                    bucket_deltas[(answer.question_id, answer.value_number)] += 1
+                if answer.value_text is not None:
+                    delta[3] += 1
+
+    if not response_count:
+        return
+
+    await _increment(
+        session,
+        SurveyCounter,
+        [{"survey_id": survey_id, "response_count": response_count, "data_version": 1}],
+        ["survey_id"],
+        ["response_count", "data_version"],
+    )
+    await _increment(
+        session,
+        QuestionCounter,
+        [
+            {
+                "question_id": question_id,
+                "survey_id": survey_id,
+                "value_count": d[0],
+                "value_sum": d[1],
+                "value_sq_sum": d[2],
+                "text_count": d[3],
+            }
+            for question_id, d in value_deltas.items()
+        ],
+        ["question_id"],
+        ["value_count", "value_sum", "value_sq_sum", "text_count"],
+    )
+    await _increment(
+        session,
+        OptionCounter,
+        [
+            {"option_id": opt_id, "question_id": question_id, "survey_id": survey_id, "count": count}
+            for (question_id, opt_id), count in option_deltas.items()
+        ],
+        ["option_id"],
+        ["count"],
+    )
+    await _increment(
+        session,
+        ScaleBucketCounter,
+        [
+            {"question_id": question_id, "value": value, "survey_id": survey_id, "count": count}
+            for (question_id, value), count in bucket_deltas.items()
+        ],
+        ["question_id", "value"],
+        ["count"],
+    )
+    await _increment(
+        session,
+        ResponseRollup,
+        [
+            {
+                "survey_id": survey_id,
+                "granularity": granularity,
+                "bucket_start": _bucket_start(granularity, bucket),
+                "count": count,
+            }
+            for (granularity, bucket), count in rollup_deltas.items()
+        ],
+        ["survey_id", "granularity", "bucket_start"],
+        ["count"],
+    )
+    await _increment(
+        session,
+        OptionRollup,
+        [
+            {
+                "option_id": opt_id,
+                "granularity": granularity,
+                "bucket_start": _bucket_start(granularity, bucket),
+                "question_id": question_id,
+                "survey_id": survey_id,
+                "count": count,
+            }
+            for (question_id, opt_id, granularity, bucket), count in option_rollup_deltas.items()
+        ],
+        ["option_id", "granularity", "bucket_start"],
+        ["count"],
+    )
+
+
+async def bump_data_version(session: AsyncSession, survey_id: UUID) -> None:
+    await _increment(
+        session,
+        SurveyCounter,
+        [{"survey_id": survey_id, "response_count": 0, "data_version": 1}],
+        ["survey_id"],
+        ["data_version"],
+    )
+
+
+async def bump_data_version_for_question(session: AsyncSession, question_id: UUID) -> Optional[UUID]:
+    stmt = pg_insert(SurveyCounter).from_select(
+        ["survey_id", "response_count", "data_version"],
+        select(Question.survey_id, literal(0), literal(1)).where(Question.id == question_id),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["survey_id"],
+        set_={"data_version": SurveyCounter.__table__.c.data_version + 1},
+    )
+    return (await session.execute(stmt.returning(SurveyCounter.survey_id))).scalar_one_or_none()
+
+
+def _response_recount_stmt(survey_id: UUID):
+    return (
+        select(Response.survey_id, func.count(Response.id))
+        .where(Response.survey_id == survey_id)
+        .group_by(Response.survey_id)
+    )
+
+
+def _value_recount_stmt(survey_id: UUID):
+    return (
+        select(
+            AnswerValue.question_id,
+            Question.survey_id,
+            func.count(AnswerValue.value_number),
+            func.coalesce(func.sum(AnswerValue.value_number), 0.0),
+            func.coalesce(func.sum(AnswerValue.value_number * AnswerValue.value_number), 0.0),
+            func.count(AnswerValue.value_text),
+        )
+        .join(Question, AnswerValue.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+        .group_by(AnswerValue.question_id, Question.survey_id)
+    )
+
+
+def _option_recount_stmt(survey_id: UUID):
+    return (
+        select(
+            Option.id,
+            Option.question_id,
+            Question.survey_id,
+            func.count(AnswerOption.id),
+        )
+        .join(Option, AnswerOption.option_id == Option.id)
+        .join(Question, Option.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+        .group_by(Option.id, Option.question_id, Question.survey_id)
+    )
+
+
+def _bucket_recount_stmt(survey_id: UUID):
+    return (
+        select(
+            AnswerValue.question_id,
+            AnswerValue.value_number,
+            Question.survey_id,
+            func.count(AnswerValue.id),
+        )
+        .join(Question, AnswerValue.question_id == Question.id)
+        .where(Question.survey_id == survey_id)
+        .where(AnswerValue.value_number.isnot(None))
+        .group_by(AnswerValue.question_id, AnswerValue.value_number, Question.survey_id)
+    )
+
+
+async def recount(session: AsyncSession, survey_id: UUID) -> CounterSnapshot:
+    snapshot = CounterSnapshot()
+    for _, count in (await session.execute(_response_recount_stmt(survey_id))).all():
+        snapshot.response_count = count
+    for question_id, _, count, total, sq_total, text_count in (
+        await session.execute(_value_recount_stmt(survey_id))
+    ).all():
+        snapshot.values[question_id] = (count, total, sq_total, text_count)
+    for opt_id, _, _, count in (await session.execute(_option_recount_stmt(survey_id))).all():
+        snapshot.options[opt_id] = count
+    for question_id, value, _, count in (await session.execute(_bucket_recount_stmt(survey_id))).all():
+        snapshot.buckets[(question_id, value)] = count
+    return snapshot
+
+
+async def load_counters(session: AsyncSession, survey_id: UUID) -> CounterSnapshot:
+    snapshot = CounterSnapshot()
+    snapshot.response_count = (
+        await session.execute(select(SurveyCounter.response_count).where(SurveyCounter.survey_id == survey_id))
+    ).scalar_one_or_none() or 0
+    for row in (await session.execute(select(QuestionCounter).where(QuestionCounter.survey_id == survey_id))).scalars():
+        snapshot.values[row.question_id] = (row.value_count, row.value_sum, row.value_sq_sum, row.text_count)
+    for row in (await session.execute(select(OptionCounter).where(OptionCounter.survey_id == survey_id))).scalars():
+        snapshot.options[row.option_id] = row.count
+    for row in (
+        await session.execute(select(ScaleBucketCounter).where(ScaleBucketCounter.survey_id == survey_id))
+    ).scalars():
+        snapshot.buckets[(row.question_id, row.value)] = row.count
+    return snapshot
+
+
+def _diff(name: str, expected: dict, actual: dict) -> list[str]:
+    problems = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        want = expected.get(key)
+        got = actual.get(key)
+        if isinstance(want, tuple) and isinstance(got, tuple):
+            if all(math.isclose(w, g, rel_tol=1e-9, abs_tol=1e-6) for w, g in zip(want, got)):
+                continue
+        elif (want or 0) == (got or 0):
+            continue
+        problems.append(f"{name} {key}: counter={got} recount={want}")
+    return problems
+
+
+async def check_survey_counters(session: AsyncSession, survey_id: UUID) -> list[str]:
+    expected = await recount(session, survey_id)
+    actual = await load_counters(session, survey_id)
+    problems = []
+    if expected.response_count != actual.response_count:
+        problems.append(f"responses: counter={actual.response_count} recount={expected.response_count}")
+    problems += _diff("question", expected.values, actual.values)
+    problems += _diff("option", expected.options, actual.options)
+    problems += _diff("bucket", expected.buckets, actual.buckets)
+    return problems
+
+
+async def rebuild_survey_counters(session: AsyncSession, survey_id: UUID) -> None:
+    await session.execute(
+        select(SurveyCounter.survey_id).where(SurveyCounter.survey_id == survey_id).with_for_update()
+    )
+    for model in (ScaleBucketCounter, OptionCounter, QuestionCounter):
+        await session.execute(delete(model).where(model.survey_id == survey_id))
+
+    response_count = (
+        await session.execute(select(func.count(Response.id)).where(Response.survey_id == survey_id))
+    ).scalar_one()
+    stmt = pg_insert(SurveyCounter).values(survey_id=survey_id, response_count=response_count, data_version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["survey_id"],
+        set_={
+            "response_count": stmt.excluded.response_count,
+            "data_version": SurveyCounter.__table__.c.data_version + 1,
+        },
+    )
+    await session.execute(stmt)
+    await session.execute(
+        insert(QuestionCounter).from_select(
+            ["question_id", "survey_id", "value_count", "value_sum", "value_sq_sum", "text_count"],
+            _value_recount_stmt(survey_id),
+        )
+    )
+    await session.execute(
+        insert(OptionCounter).from_select(
+            ["option_id", "question_id", "survey_id", "count"],
+            _option_recount_stmt(survey_id),
+        )
+    )
+    await session.execute(
+        insert(ScaleBucketCounter).from_select(
+            ["question_id", "value", "survey_id", "count"],
+            _bucket_recount_stmt(survey_id),
+        )
+    )
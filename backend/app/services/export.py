@@ -0,0 +1,207 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_session_maker
+from app.models import AnswerOption, AnswerValue, Option, Question, QuestionType, Response
+
+
+EXPORT_STREAM_BATCH_SIZE = 1000
+PARQUET_ROW_GROUP_SIZE = 10000
+BASE_COLUMNS = ["response_id", "submitted_at", "user_id"]
+
+
+class ExportFormat(str, enum.Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+    parquet = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv",
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+
+async def load_export_columns(session: AsyncSession, survey_id: UUID) -> list[tuple[UUID, str, QuestionType]]:
+    questions = (
+        await session.execute(
+            select(Question.id, Question.text, Question.type)
+            .where(Question.survey_id == survey_id)
+            .order_by(Question.order)
+        )
+    ).all()
+    return [(q_id, f"{idx}. {text}", q_type) for idx, (q_id, text, q_type) in enumerate(questions, 1)]
+
+
+async def _iter_records(
+    survey_id: UUID,
+    columns: list[tuple[UUID, str, QuestionType]],
+) -> AsyncIterator[dict[str, Any]]:
+    labels = {q_id: label for q_id, label, _ in columns}
+    stmt = (
+        select(
+            Response.id,
+            Response.submitted_at,
+            Response.user_id,
+            AnswerValue.question_id,
+            AnswerValue.value_text,
+            AnswerValue.value_number,
+            Option.text,
+        )
+        .select_from(Response)
+        .outerjoin(AnswerValue, AnswerValue.response_id == Response.id)
+        .outerjoin(AnswerOption, AnswerOption.answer_value_id == AnswerValue.id)
+        .outerjoin(Option, Option.id == AnswerOption.option_id)
+        .where(Response.survey_id == survey_id)
+        .order_by(Response.submitted_at, Response.id, AnswerValue.question_id, Option.order)
+    )
+
+    record: Optional[dict[str, Any]] = None
+    option_texts: dict[str, list[str]] = {}
+    async with async_session_maker() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_STREAM_BATCH_SIZE))
+        async for response_id, submitted_at, user_id, question_id, value_text, value_number, option_text in result:
+            if record is None or record["response_id"] != response_id:
+                if record is not None:
+                    yield _finish_record(record, option_texts)
+                record = {label: None for _, label, _ in columns}
+                record.update(response_id=response_id, submitted_at=submitted_at, user_id=user_id)
+                option_texts = {}
+            label = labels.get(question_id)
+            if label is None:
+                continue
+            if option_text is not None:
+                option_texts.setdefault(label, []).append(option_text)
+            elif value_number is not None:
+                record[label] = value_number
+            elif value_text is not None:
+                record[label] = value_text
+        await result.close()
+    if record is not None:
+        yield _finish_record(record, option_texts)
+
+
+def _finish_record(record: dict[str, Any], option_texts: dict[str, list[str]]) -> dict[str, Any]:
+    for label, texts in option_texts.items():
+        record[label] = "; ".join(texts)
+    return record
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def _iter_csv(records: AsyncIterator[dict[str, Any]], header: list[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    rows = 0
+    async for record in records:
+        writer.writerow(
+            [record["submitted_at"].isoformat() if key == "submitted_at" else record[key] for key in header]
+        )
+        rows += 1
+        if rows % EXPORT_STREAM_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+async def _iter_ndjson(records: AsyncIterator[dict[str, Any]], header: list[str]) -> AsyncIterator[bytes]:
+    lines = []
+    async for record in records:
+        lines.append(json.dumps(record, default=_json_default, ensure_ascii=False))
+        if len(lines) == EXPORT_STREAM_BATCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+async def _iter_parquet(
+    records: AsyncIterator[dict[str, Any]],
+    header: list[str],
+    columns: list[tuple[UUID, str, QuestionType]],
+) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [
+        pa.field("response_id", pa.string()),
+        pa.field("submitted_at", pa.timestamp("us", tz="UTC")),
+        pa.field("user_id", pa.string()),
+    ]
+    for _, label, q_type in columns:
+        fields.append(pa.field(label, pa.float64() if q_type == QuestionType.scale else pa.string()))
+    schema = pa.schema(fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch: dict[str, list] = {key: [] for key in header}
+
+    def flush() -> None:
+        writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+        for values in batch.values():
+            values.clear()
+
+    async for record in records:
+        for key in header:
+            value = record[key]
+            if isinstance(value, UUID):
+                value = str(value)
+            batch[key].append(value)
+        if len(batch["response_id"]) == PARQUET_ROW_GROUP_SIZE:
+            flush()
+            yield sink.drain()
+    if batch["response_id"]:
+        flush()
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export(
+    survey_id: UUID,
+    columns: list[tuple[UUID, str, QuestionType]],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    header = BASE_COLUMNS + [label for _, label, _ in columns]
+    records = _iter_records(survey_id, columns)
+    if export_format == ExportFormat.csv:
+        return _iter_csv(records, header)
+    if export_format == ExportFormat.ndjson:
+        return _iter_ndjson(records, header)
+    return _iter_parquet(records, header, columns)
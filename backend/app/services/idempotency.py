@@ -0,0 +1,96 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(Exception):
+    pass
+
+
+class IdempotencyKeyInFlight(Exception):
+    pass
+
+
+async def delete_expired_keys(session: AsyncSession, limit: int) -> int:
+    expired = (
+        select(IdempotencyKey.survey_id, IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at <= func.now())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(
+        delete(IdempotencyKey).where(tuple_(IdempotencyKey.survey_id, IdempotencyKey.key).in_(expired))
+    )
+    return result.rowcount
+
+
+async def claim_idempotency_key(
+    session: AsyncSession,
+    survey_id: UUID,
+    key: str,
+    user_id: Optional[UUID],
+    session_id: Optional[str],
+) -> Optional[dict]:
+    if random.random() < settings.IDEMPOTENCY_CLEANUP_PROBABILITY:
+        await delete_expired_keys(session, settings.IDEMPOTENCY_CLEANUP_BATCH_SIZE)
+
+    # The insert waits on a concurrent request holding the same key until it
+    # commits or rolls back, so only one of them ever runs the submission.
+    now = datetime.now(timezone.utc)
+    stmt = pg_insert(IdempotencyKey).values(
+        survey_id=survey_id,
+        key=key,
+        user_id=user_id,
+        session_id=session_id,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.survey_id, IdempotencyKey.key],
+        set_={
+            "user_id": stmt.excluded.user_id,
+            "session_id": stmt.excluded.session_id,
+            "response": None,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=IdempotencyKey.expires_at <= now,
+    ).returning(IdempotencyKey.key)
+    if (await session.execute(stmt)).first() is not None:
+        return None
+
+    stored_user_id, stored_session_id, response = (
+        await session.execute(
+            select(IdempotencyKey.user_id, IdempotencyKey.session_id, IdempotencyKey.response).where(
+                IdempotencyKey.survey_id == survey_id,
+                IdempotencyKey.key == key,
+            )
+        )
+    ).one()
+    if stored_user_id != user_id:
+        raise IdempotencyKeyReused()
+    if response is None:
+        raise IdempotencyKeyInFlight()
+    # A retry whose survey_session_id cookie was lost (the first response never
+    # arrived) comes with a fresh session; it still gets its response id, but not
+    # the request metadata, so a leaked key does not expose another respondent.
+    if stored_session_id != session_id:
+        return {**response, "meta": None}
+    return response
+
+
+async def store_idempotent_response(session: AsyncSession, survey_id: UUID, key: str, response: dict) -> None:
+    await session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.survey_id == survey_id, IdempotencyKey.key == key)
+        .values(response=response)
+    )
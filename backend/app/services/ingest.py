@@ -0,0 +1,152 @@
+import csv
+import enum
+import io
+import json
+import math
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Union
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import QuestionType
+from app.schemas import AnswerValueSubmit, BatchIngestError, BatchIngestResult, ResponseImportRow
+from app.services.counters import record_responses
+from app.services.validation import SurveyPlan, validate_answers
+
+
+ParsedRow = tuple[int, Union[ResponseImportRow, list[dict]]]
+
+
+class IngestFormat(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def _row_errors(e: Exception) -> list[dict]:
+    if isinstance(e, ValidationError):
+        return [{"error": f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}"} for err in e.errors()]
+    return [{"error": str(e)}]
+
+
+def parse_ndjson(data: str) -> Iterator[ParsedRow]:
+    for line_no, line in enumerate(data.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, ResponseImportRow.model_validate_json(line)
+        except ValueError as e:
+            yield line_no, _row_errors(e)
+
+
+def parse_csv(data: str, plan: SurveyPlan) -> Iterator[ParsedRow]:
+    reader = csv.DictReader(io.StringIO(data))
+    columns = []
+    for name in reader.fieldnames or []:
+        if name == "submitted_at":
+            continue
+        try:
+            question_id = UUID(name)
+        except ValueError:
+            raise ValueError(f"Unknown column: {name}")
+        if question_id not in plan.questions:
+            raise ValueError(f"Unknown question column: {name}")
+        columns.append((name, question_id, plan.questions[question_id].type))
+    return _iter_csv_rows(reader, columns)
+
+
+def _iter_csv_rows(reader: csv.DictReader, columns: list[tuple]) -> Iterator[ParsedRow]:
+    for line_no, record in enumerate(reader, 2):
+        try:
+            answers = []
+            for name, question_id, q_type in columns:
+                cell = (record.get(name) or "").strip()
+                if not cell:
+                    continue
+                if q_type in (QuestionType.single, QuestionType.multi):
+                    option_ids = [UUID(part) for part in cell.split("|") if part.strip()]
+                    if option_ids:
+                        answers.append(AnswerValueSubmit(question_id=question_id, option_ids=option_ids))
+                elif q_type == QuestionType.scale:
+                    value = float(cell)
+                    if not math.isfinite(value):
+                        raise ValueError(f"{name}: scale value must be a finite number")
+                    answers.append(AnswerValueSubmit(question_id=question_id, value_number=value))
+                else:
+                    answers.append(AnswerValueSubmit(question_id=question_id, value_text=cell))
+            submitted_at = record.get("submitted_at") or None
+            yield line_no, ResponseImportRow(submitted_at=submitted_at, answers=answers)
+        except ValueError as e:
+            yield line_no, _row_errors(e)
+
+
+def parse_rows(data: str, ingest_format: IngestFormat, plan: SurveyPlan) -> Iterator[ParsedRow]:
+    if ingest_format == IngestFormat.csv:
+        return parse_csv(data, plan)
+    return parse_ndjson(data)
+
+
+async def _copy(session: AsyncSession, table: str, columns: list[str], records: list[tuple]) -> None:
+    if not records:
+        return
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+
+async def ingest_responses(
+    session: AsyncSession,
+    plan: SurveyPlan,
+    rows: Iterable[ParsedRow],
+) -> BatchIngestResult:
+    now = datetime.now(timezone.utc)
+    errors: list[BatchIngestError] = []
+    response_records = []
+    value_records = []
+    option_records = []
+    answer_sets = []
+    submitted_at = []
+
+    for line_no, row in rows:
+        if not isinstance(row, ResponseImportRow):
+            errors.append(BatchIngestError(row=line_no, errors=row))
+            continue
+        row_errors = validate_answers(plan, row.answers)
+        if row_errors:
+            errors.append(BatchIngestError(row=line_no, errors=row_errors))
+            continue
+
+        ts = row.submitted_at or now
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        meta = {**(row.meta or {}), "source": "import"}
+        response_id = uuid4()
+        response_records.append((response_id, plan.survey_id, ts, json.dumps(meta), plan.published_version))
+        for answer in row.answers:
+            answer_value_id = uuid4()
+            value_records.append(
+                (answer_value_id, response_id, answer.question_id, answer.value_text, answer.value_number)
+            )
+            for opt_id in answer.option_ids or []:
+                option_records.append((uuid4(), answer_value_id, opt_id))
+        answer_sets.append(row.answers)
+        submitted_at.append(ts)
+
+    await _copy(
+        session,
+        "responses",
+        ["id", "survey_id", "submitted_at", "meta", "survey_version"],
+        response_records,
+    )
+    await _copy(
+        session,
+        "answer_values",
+        ["id", "response_id", "question_id", "value_text", "value_number"],
+        value_records,
+    )
+    await _copy(session, "answer_options", ["id", "answer_value_id", "option_id"], option_records)
+    await record_responses(session, plan.survey_id, answer_sets, submitted_at=submitted_at)
+    await session.commit()
+
+    return BatchIngestResult(accepted=len(response_records), rejected=len(errors), errors=errors)
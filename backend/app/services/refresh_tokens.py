@@ -0,0 +1,168 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.db import async_session_maker
+from app.models import RefreshToken
+
+
+REVOCATION_CHANNEL = "refresh_token_revoked"
+
+
+class RevocationSet:
+    def __init__(self) -> None:
+        self._families: dict[UUID, datetime] = {}
+        self._added_during_warm: Optional[dict[UUID, datetime]] = None
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+        self.warms = 0
+        self.notifications = 0
+        metrics.register("auth.revocations", self.stats)
+
+    def is_revoked(self, family_id: UUID) -> bool:
+        return family_id in self._families
+
+    @staticmethod
+    def _merge(families: dict[UUID, datetime], family_id: UUID, expires_at: datetime) -> None:
+        families[family_id] = max(expires_at, families.get(family_id, expires_at))
+
+    def add(self, family_id: UUID, expires_at: datetime) -> None:
+        self._merge(self._families, family_id, expires_at)
+        if self._added_during_warm is not None:
+            self._merge(self._added_during_warm, family_id, expires_at)
+
+    async def warm(self) -> None:
+        # Families revoked while the query runs may be missing from its snapshot;
+        # they are collected by add() and re-applied before the set is swapped.
+        self._added_during_warm = {}
+        try:
+            async with async_session_maker() as session:
+                await session.execute(delete(RefreshToken).where(RefreshToken.expires_at <= func.now()))
+                rows = await session.execute(
+                    select(RefreshToken.family_id, func.max(RefreshToken.expires_at))
+                    .where(RefreshToken.revoked_at.is_not(None))
+                    .group_by(RefreshToken.family_id)
+                )
+                families = dict(rows.all())
+                await session.commit()
+            for family_id, expires_at in self._added_during_warm.items():
+                self._merge(families, family_id, expires_at)
+            self._families = families
+        finally:
+            self._added_during_warm = None
+        self.warms += 1
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        family_id, expires_at = payload.split("|", 1)
+        self.add(UUID(family_id), datetime.fromisoformat(expires_at))
+        self.notifications += 1
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        self._connection = await asyncpg.connect(settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://"))
+        await self._connection.add_listener(REVOCATION_CHANNEL, self._on_notify)
+
+    async def _run(self) -> None:
+        # Listen before warming so nothing revoked in between is missed; the
+        # periodic re-warm covers notifications lost while the listener was down.
+        while True:
+            try:
+                if self._connection is None or self._connection.is_closed():
+                    await self._listen()
+                await self.warm()
+            except Exception as e:
+                print(f"Warning: refresh token revocation sync failed: {e}", file=sys.stderr)
+            await asyncio.sleep(settings.REVOCATION_RESYNC_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    def stats(self) -> dict:
+        return {
+            "revoked_families": len(self._families),
+            "warms": self.warms,
+            "notifications": self.notifications,
+            "listening": self._connection is not None and not self._connection.is_closed(),
+        }
+
+
+revocations = RevocationSet()
+
+
+async def issue_refresh_token(
+    session: AsyncSession,
+    user_id: UUID,
+    family_id: Optional[UUID] = None,
+) -> RefreshToken:
+    token = RefreshToken(
+        jti=uuid4(),
+        family_id=family_id or uuid4(),
+        user_id=user_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    session.add(token)
+    await session.flush()
+    return token
+
+
+async def revoke_family(session: AsyncSession, family_id: UUID) -> Optional[datetime]:
+    await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
+    expires_at = (
+        await session.execute(select(func.max(RefreshToken.expires_at)).where(RefreshToken.family_id == family_id))
+    ).scalar_one()
+    if expires_at is not None:
+        # Delivered to every worker's listener when the transaction commits.
+        await session.execute(select(func.pg_notify(REVOCATION_CHANNEL, f"{family_id}|{expires_at.isoformat()}")))
+    return expires_at
+
+
+async def rotate_refresh_token(session: AsyncSession, jti: UUID, user_id: UUID) -> Optional[UUID]:
+    family_id = (
+        await session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.jti == jti,
+                RefreshToken.user_id == user_id,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > func.now(),
+            )
+            .values(used_at=func.now())
+            .returning(RefreshToken.family_id)
+        )
+    ).scalar_one_or_none()
+    if family_id is not None:
+        return family_id
+
+    # A token that exists but was already used has been replayed: assume it was
+    # stolen and revoke everything issued from the same login.
+    reused_family = (
+        await session.execute(select(RefreshToken.family_id).where(RefreshToken.jti == jti))
+    ).scalar_one_or_none()
+    if reused_family is not None:
+        expires_at = await revoke_family(session, reused_family)
+        await session.commit()
+        if expires_at is not None:
+            revocations.add(reused_family, expires_at)
+    return None
@@ -0,0 +1,154 @@
+import asyncio
+import sys
+import time
+from typing import List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud import ResponseSubmission, insert_responses
+from app.db import async_session_maker
+from app.models import Response
+
+
+class BufferFull(Exception):
+    pass
+
+
+class SubmissionBuffer:
+    def __init__(self, max_queue: int, batch_size: int, max_delay: float) -> None:
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = True
+        self.batches = 0
+        self.flushed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        metrics.register("submit_buffer", self.stats)
+
+    @property
+    def running(self) -> bool:
+        return not self._closed
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, submission: ResponseSubmission) -> Response:
+        if self._closed:
+            raise BufferFull()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((submission, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise BufferFull()
+        return await future
+
+    async def _next_batch(self) -> tuple[list, bool]:
+        item = await self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                await self._flush([item])
+
+    async def _write(self, submissions: List[ResponseSubmission]) -> List[Response]:
+        async with async_session_maker() as session:
+            responses = await insert_responses(session, submissions)
+            await session.commit()
+        return responses
+
+    async def _flush(self, batch: list) -> None:
+        started = time.monotonic()
+        try:
+            responses = await self._write([submission for submission, _ in batch])
+        except Exception:
+            # One bad submission must not fail its neighbours: retry them one by one.
+            for submission, future in batch:
+                try:
+                    [response] = await self._write([submission])
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Warning: buffered submission failed: {e}", file=sys.stderr)
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.flushed += 1
+                    if not future.done():
+                        future.set_result(response)
+        else:
+            self.flushed += len(batch)
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+        elapsed = time.monotonic() - started
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.flush_seconds_total += elapsed
+        self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batches": self.batches,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": self.flushed / self.batches if self.batches else 0.0,
+            "avg_flush_seconds": self.flush_seconds_total / self.batches if self.batches else 0.0,
+            "max_flush_seconds": self.flush_seconds_max,
+        }
+
+
+submission_buffer = SubmissionBuffer(
+    max_queue=settings.SUBMIT_BUFFER_MAX_QUEUE,
+    batch_size=settings.SUBMIT_BUFFER_BATCH_SIZE,
+    max_delay=settings.SUBMIT_BUFFER_MAX_DELAY_SECONDS,
+)
@@ -0,0 +1,60 @@
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models import Question, Survey
+from app.schemas import SurveyRead
+
+
+_survey_cache: LRUCache[UUID, tuple[int, bytes]] = LRUCache(
+    "surveys",
+    settings.SURVEY_CACHE_MAX_BYTES,
+    sizeof=lambda entry: len(entry[1]),
+)
+
+
+def survey_etag(survey_id: UUID, version: int) -> str:
+    return f'"{survey_id}.{version}"'
+
+
+async def get_survey_version(session: AsyncSession, survey_id: UUID) -> Optional[tuple[int, bool]]:
+    row = (
+        await session.execute(select(Survey.version, Survey.is_published).where(Survey.id == survey_id))
+    ).first()
+    return tuple(row) if row is not None else None
+
+
+async def render_survey(session: AsyncSession, survey_id: UUID) -> Optional[tuple[int, bool, bytes]]:
+    survey = (
+        await session.execute(
+            select(Survey)
+            .where(Survey.id == survey_id)
+            .options(selectinload(Survey.questions).selectinload(Question.options))
+        )
+    ).scalar_one_or_none()
+    if survey is None:
+        return None
+    return survey.version, survey.is_published, SurveyRead.model_validate(survey).model_dump_json().encode()
+
+
+async def get_survey_json(session: AsyncSession, survey_id: UUID, version: int) -> Optional[tuple[int, bytes]]:
+    cached = _survey_cache.get(survey_id)
+    if cached is not None and cached[0] == version:
+        return cached
+    rendered = await render_survey(session, survey_id)
+    if rendered is None:
+        return None
+    version, is_published, body = rendered
+    # Only published definitions are hot enough to keep; drafts change on every edit.
+    if is_published:
+        _survey_cache.set(survey_id, (version, body))
+    return version, body
+
+
+def invalidate_survey_json(survey_id: UUID) -> None:
+    _survey_cache.pop(survey_id)
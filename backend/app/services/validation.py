@@ -0,0 +1,177 @@
+import math
+from dataclasses import dataclass, replace
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models import Option, Question, QuestionType, Survey
+from app.schemas import AnswerValueSubmit
+
+
+@dataclass(frozen=True)
+class QuestionRule:
+    type: QuestionType
+    required: bool
+    option_ids: frozenset
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class SurveyPlan:
+    survey_id: UUID
+    version: int
+    is_published: bool
+    published_version: Optional[int]
+    questions: dict
+
+
+# Keyed on (survey_id, Survey.version): every structural edit bumps the version,
+# so a worker that missed the edit looks up a new key instead of a stale plan.
+_plan_cache: LRUCache[tuple, SurveyPlan] = LRUCache(
+    "validation_plans",
+    settings.VALIDATION_PLAN_CACHE_SIZE,
+    ttl_seconds=settings.VALIDATION_PLAN_TTL_SECONDS,
+)
+
+
+def _scale_bound(meta: Optional[dict], key: str) -> Optional[float]:
+    value = (meta or {}).get(key)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+async def compile_survey_plan(session: AsyncSession, survey_id: UUID) -> Optional[SurveyPlan]:
+    rows = (
+        await session.execute(
+            select(
+                Survey.version,
+                Survey.is_published,
+                Survey.published_version,
+                Question.id,
+                Question.type,
+                Question.required,
+                Question.meta,
+                Option.id,
+            )
+            .select_from(Survey)
+            .outerjoin(Question, Question.survey_id == Survey.id)
+            .outerjoin(Option, Option.question_id == Question.id)
+            .where(Survey.id == survey_id)
+        )
+    ).all()
+    if not rows:
+        return None
+
+    version, is_published, published_version = rows[0][:3]
+    question_rows: dict[UUID, tuple] = {}
+    option_ids: dict[UUID, set] = {}
+    for _, _, _, question_id, q_type, required, meta, option_id in rows:
+        if question_id is None:
+            continue
+        question_rows[question_id] = (q_type, required, meta)
+        option_ids.setdefault(question_id, set())
+        if option_id is not None:
+            option_ids[question_id].add(option_id)
+
+    questions = {
+        question_id: QuestionRule(
+            type=q_type,
+            required=required,
+            option_ids=frozenset(option_ids[question_id]),
+            min_value=_scale_bound(meta, "min") if q_type == QuestionType.scale else None,
+            max_value=_scale_bound(meta, "max") if q_type == QuestionType.scale else None,
+        )
+        for question_id, (q_type, required, meta) in question_rows.items()
+    }
+    return SurveyPlan(
+        survey_id=survey_id,
+        version=version,
+        is_published=is_published,
+        published_version=published_version,
+        questions=questions,
+    )
+
+
+async def get_survey_plan(session: AsyncSession, survey_id: UUID) -> Optional[SurveyPlan]:
+    header = (
+        await session.execute(
+            select(Survey.version, Survey.is_published, Survey.published_version).where(Survey.id == survey_id)
+        )
+    ).one_or_none()
+    if header is None:
+        return None
+    version, is_published, published_version = header
+    plan = _plan_cache.get((survey_id, version))
+    if plan is None:
+        plan = await compile_survey_plan(session, survey_id)
+        if plan is None:
+            return None
+        _plan_cache.set((survey_id, plan.version), plan)
+    if (plan.is_published, plan.published_version) != (is_published, published_version):
+        plan = replace(plan, is_published=is_published, published_version=published_version)
+    return plan
+
+
+def _is_empty(answer: AnswerValueSubmit) -> bool:
+    return (
+        not answer.option_ids
+        and answer.value_number is None
+        and (answer.value_text is None or not answer.value_text.strip())
+    )
+
+
+def _check_answer(rule: QuestionRule, answer: AnswerValueSubmit) -> Optional[str]:
+    if rule.type in (QuestionType.single, QuestionType.multi):
+        if answer.value_number is not None or answer.value_text:
+            return "Choice questions accept option_ids only"
+        option_ids = answer.option_ids or []
+        if rule.type == QuestionType.single and len(option_ids) > 1:
+            return "Single choice questions accept one option"
+        if len(set(option_ids)) != len(option_ids):
+            return "Duplicate option ids"
+        if not rule.option_ids.issuperset(option_ids):
+            return "Unknown option id"
+    elif rule.type == QuestionType.scale:
+        if answer.option_ids or answer.value_text:
+            return "Scale questions accept value_number only"
+        if answer.value_number is not None:
+            if not math.isfinite(answer.value_number):
+                return "Value must be a finite number"
+            if rule.min_value is not None and answer.value_number < rule.min_value:
+                return "Value is below the scale minimum"
+            if rule.max_value is not None and answer.value_number > rule.max_value:
+                return "Value is above the scale maximum"
+    else:
+        if answer.option_ids or answer.value_number is not None:
+            return "Text questions accept value_text only"
+    return None
+
+
+def validate_answers(plan: SurveyPlan, answers: List[AnswerValueSubmit]) -> list[dict]:
+    errors: list[dict] = []
+    answered: set = set()
+    for answer in answers:
+        rule = plan.questions.get(answer.question_id)
+        if rule is None:
+            errors.append({"question_id": str(answer.question_id), "error": "Unknown question"})
+            continue
+        if answer.question_id in answered:
+            errors.append({"question_id": str(answer.question_id), "error": "Question answered more than once"})
+            continue
+        answered.add(answer.question_id)
+        error = _check_answer(rule, answer)
+        if error is not None:
+            errors.append({"question_id": str(answer.question_id), "error": error})
+        elif rule.required and _is_empty(answer):
+            errors.append({"question_id": str(answer.question_id), "error": "Answer is required"})
+
+    for question_id, rule in plan.questions.items():
+        if rule.required and question_id not in answered:
+            errors.append({"question_id": str(question_id), "error": "Answer is required"})
+    return errors
@@ -0,0 +1,90 @@
+import random
+from typing import List
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import create_survey_with_questions
+from app.models import (
+    AnswerOption,
+    AnswerValue,
+    Option,
+    Question,
+    QuestionType,
+    Response,
+    Survey,
+    User,
+)
+from app.schemas import AnswerValueSubmit, OptionCreate, QuestionCreate, SurveyCreate
+
+
+QUESTION_TYPES = [QuestionType.single, QuestionType.multi, QuestionType.scale, QuestionType.text]
+
+
+async def create_user(session: AsyncSession) -> User:
+    user = User(email=f"bench-{uuid4()}@example.com", password_hash="!", full_name="benchmark")
+    session.add(user)
+    await session.commit()
+    return user
+
+
+async def create_survey(session: AsyncSession, owner_id: UUID, question_count: int) -> Survey:
+    questions = []
+    for idx in range(question_count):
+        q_type = QUESTION_TYPES[idx % len(QUESTION_TYPES)]
+        options = None
+        if q_type in (QuestionType.single, QuestionType.multi):
+            options = [OptionCreate(text=f"option {o}", order=o) for o in range(4)]
+        questions.append(
+            QuestionCreate(text=f"question {idx}", type=q_type, required=False, order=idx, options=options)
+        )
+    survey_in = SurveyCreate(title=f"benchmark {question_count}q", description="", questions=questions)
+    survey = await create_survey_with_questions(session, owner_id, survey_in)
+    survey.is_published = True
+    await session.commit()
+    return survey
+
+
+async def load_questions(session: AsyncSession, survey_id: UUID) -> list[tuple[Question, list[UUID]]]:
+    questions = (
+        await session.execute(select(Question).where(Question.survey_id == survey_id).order_by(Question.order))
+    ).scalars().all()
+    options = (
+        await session.execute(
+            select(Option.question_id, Option.id).join(Question).where(Question.survey_id == survey_id)
+        )
+    ).all()
+    by_question: dict[UUID, list[UUID]] = {}
+    for question_id, option_id in options:
+        by_question.setdefault(question_id, []).append(option_id)
+    return [(q, by_question.get(q.id, [])) for q in questions]
+
+
+def random_answers(questions: list[tuple[Question, list[UUID]]]) -> List[AnswerValueSubmit]:
+    answers = []
+    for q, option_ids in questions:
+        if q.type == QuestionType.single:
+            answers.append(AnswerValueSubmit(question_id=q.id, option_ids=[random.choice(option_ids)]))
+        elif q.type == QuestionType.multi:
+            answers.append(AnswerValueSubmit(question_id=q.id, option_ids=random.sample(option_ids, 2)))
+        elif q.type == QuestionType.scale:
+            answers.append(AnswerValueSubmit(question_id=q.id, value_number=float(random.randint(1, 10))))
+        else:
+            answers.append(AnswerValueSubmit(question_id=q.id, value_text=f"answer {random.random()}"))
+    return answers
+
+
+async def drop_owner_data(session: AsyncSession, owner_id: UUID) -> None:
+    survey_ids = select(Survey.id).where(Survey.owner_id == owner_id)
+    question_ids = select(Question.id).where(Question.survey_id.in_(survey_ids))
+    response_ids = select(Response.id).where(Response.survey_id.in_(survey_ids))
+    value_ids = select(AnswerValue.id).where(AnswerValue.response_id.in_(response_ids))
+    await session.execute(delete(AnswerOption).where(AnswerOption.answer_value_id.in_(value_ids)))
+    await session.execute(delete(AnswerValue).where(AnswerValue.response_id.in_(response_ids)))
+    await session.execute(delete(Response).where(Response.survey_id.in_(survey_ids)))
+    await session.execute(delete(Option).where(Option.question_id.in_(question_ids)))
+    await session.execute(delete(Question).where(Question.survey_id.in_(survey_ids)))
+    await session.execute(delete(Survey).where(Survey.owner_id == owner_id))
+    await session.execute(delete(User).where(User.id == owner_id))
+    await session.commit()
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import sys
+import time
+from typing import Optional, Sequence
+
+from sqlalchemy import event, text
+
+from app.crud import submit_response
+from app.db import async_session_maker, engine
+from app.models import QuestionType
+from app.schemas import AnswerFilter, ResponseImportRow, SegmentedAnalyticsRequest
+from app.services.analytics import get_segmented_analytics, get_survey_analytics
+from app.services.ingest import ingest_responses
+from app.services.validation import compile_survey_plan
+from benchmarks._fixtures import create_survey, create_user, drop_owner_data, load_questions, random_answers
+
+
+SEGMENTED_QUESTIONS = 8
+INGEST_CHUNK = 50_000
+SEGMENTED_TARGET_MS = 1000.0
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+
+async def run(sizes: Sequence[int], responses: int) -> int:
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    async with async_session_maker() as session:
+        owner = await create_user(session)
+        try:
+            print(f"{'questions':>10} {'statements':>11} {'ms':>9}")
+            results = []
+            for size in sizes:
+                survey = await create_survey(session, owner.id, size)
+                questions = await load_questions(session, survey.id)
+                for i in range(responses):
+                    await submit_response(session, survey.id, None, random_answers(questions), session_id=f"bench-{i}")
+
+                counter.count = 0
+                started = time.perf_counter()
+                await get_survey_analytics(session, survey.id)
+                elapsed = (time.perf_counter() - started) * 1000
+                results.append(counter.count)
+                print(f"{size:>10} {counter.count:>11} {elapsed:>9.1f}")
+        finally:
+            await session.rollback()
+            await drop_owner_data(session, owner.id)
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
+
+    if len(set(results)) > 1:
+        print("statement count grows with the number of questions")
+        return 1
+    print(f"statement count is flat: {results[0]} per survey")
+    return 0
+
+
+async def run_segmented(responses: int) -> int:
+    counter = StatementCounter()
+    async with async_session_maker() as session:
+        owner = await create_user(session)
+    try:
+        async with async_session_maker() as session:
+            survey = await create_survey(session, owner.id, SEGMENTED_QUESTIONS)
+            questions = await load_questions(session, survey.id)
+            plan = await compile_survey_plan(session, survey.id)
+            for start in range(0, responses, INGEST_CHUNK):
+                chunk = range(start, min(start + INGEST_CHUNK, responses))
+                rows = [(i, ResponseImportRow(answers=random_answers(questions))) for i in chunk]
+                await ingest_responses(session, plan, rows)
+            await session.execute(text("ANALYZE"))
+            await session.commit()
+
+            single = [(q, option_ids) for q, option_ids in questions if q.type == QuestionType.single]
+            multi = [(q, option_ids) for q, option_ids in questions if q.type == QuestionType.multi]
+            request = SegmentedAnalyticsRequest(
+                filters=[AnswerFilter(question_id=multi[0][0].id, option_ids=multi[0][1][:2])],
+                breakdown_question_id=single[0][0].id,
+            )
+
+            event.listen(engine.sync_engine, "before_cursor_execute", counter)
+            started = time.perf_counter()
+            await get_segmented_analytics(session, survey.id, request)
+            elapsed = (time.perf_counter() - started) * 1000
+            event.remove(engine.sync_engine, "before_cursor_execute", counter)
+            await session.rollback()
+    finally:
+        async with async_session_maker() as session:
+            await drop_owner_data(session, owner.id)
+
+    print(f"segmented cross-tab over {responses} responses: {counter.count} statements, {elapsed:.1f} ms")
+    if elapsed > SEGMENTED_TARGET_MS:
+        print(f"slower than the {SEGMENTED_TARGET_MS:.0f} ms target")
+        return 1
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.analytics_queries",
+        description="count SQL statements issued by get_survey_analytics for surveys of growing size",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 20, 60, 120, 240])
+    parser.add_argument("--responses", type=int, default=20, help="responses submitted to each survey")
+    parser.add_argument(
+        "--segmented",
+        type=int,
+        metavar="RESPONSES",
+        help="instead, time a filtered breakdown cross-tab over a survey with this many responses",
+    )
+    args = parser.parse_args(argv)
+    if args.segmented:
+        return asyncio.run(run_segmented(args.segmented))
+    return asyncio.run(run(args.sizes, args.responses))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
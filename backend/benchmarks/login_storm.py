@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import itertools
+import statistics
+import sys
+import time
+from typing import Optional, Sequence
+
+from app.auth import get_password_hash, verify_and_update_password, verify_password
+from app.core.workers import WorkerPoolBusy
+from app.crud import submit_response
+from app.db import async_session_maker
+from benchmarks._fixtures import create_survey, create_user, drop_owner_data, load_questions, random_answers
+
+
+PASSWORD = "benchmark-password"
+
+
+async def _login_inline(password_hash: str) -> None:
+    # The login path before the worker pool: bcrypt runs on the event loop.
+    verify_password(PASSWORD, password_hash)
+
+
+async def _login_pooled(password_hash: str) -> None:
+    await verify_and_update_password(PASSWORD, password_hash)
+
+
+LOGIN_MODES = {
+    "none": None,
+    "inline": _login_inline,
+    "pool": _login_pooled,
+}
+
+
+async def _storm(login, password_hash: str, stop: asyncio.Event, stats: dict) -> None:
+    while not stop.is_set():
+        try:
+            await login(password_hash)
+            stats["logins"] += 1
+        except WorkerPoolBusy:
+            stats["shed"] += 1
+            await asyncio.sleep(0.01)
+        # Let other tasks run between inline logins, as separate requests would.
+        await asyncio.sleep(0)
+
+
+async def _submitter(survey_id, questions, sequence, deadline: float, latencies: list) -> None:
+    async with async_session_maker() as session:
+        while time.perf_counter() < deadline:
+            answers = random_answers(questions)
+            started = time.perf_counter()
+            await submit_response(session, survey_id, None, answers, session_id=f"storm-{next(sequence)}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(duration: float, logins: int, submitters: int, questions: int) -> int:
+    password_hash = get_password_hash(PASSWORD)
+    async with async_session_maker() as session:
+        owner = await create_user(session)
+    try:
+        async with async_session_maker() as session:
+            survey = await create_survey(session, owner.id, questions)
+            survey_questions = await load_questions(session, survey.id)
+        sequence = itertools.count()
+
+        print(f"{duration:.0f}s per mode, {logins} concurrent logins, {submitters} concurrent submitters")
+        print(f"{'logins':>8} {'submits':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'logins/s':>9} {'shed':>6}")
+        for name, login in LOGIN_MODES.items():
+            stop = asyncio.Event()
+            stats = {"logins": 0, "shed": 0}
+            latencies: list = []
+            storm = [
+                asyncio.create_task(_storm(login, password_hash, stop, stats))
+                for _ in range(logins if login is not None else 0)
+            ]
+            deadline = time.perf_counter() + duration
+            await asyncio.gather(
+                *(_submitter(survey.id, survey_questions, sequence, deadline, latencies) for _ in range(submitters))
+            )
+            stop.set()
+            await asyncio.gather(*storm)
+            print(
+                f"{name:>8} {len(latencies):>8} {statistics.median(latencies):>8.1f} "
+                f"{_percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f} "
+                f"{stats['logins'] / duration:>9.1f} {stats['shed']:>6}"
+            )
+    finally:
+        async with async_session_maker() as session:
+            await drop_owner_data(session, owner.id)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.login_storm",
+        description="measure submission latency while bcrypt logins run inline or on the worker pool",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per mode")
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--submitters", type=int, default=8, help="concurrent submission loops")
+    parser.add_argument("--questions", type=int, default=20)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args.duration, args.logins, args.submitters, args.questions))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
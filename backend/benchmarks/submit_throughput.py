@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import ResponseSubmission, submit_response
+from app.db import async_session_maker, engine
+from app.models import AnswerOption, AnswerValue, Response
+from app.schemas import AnswerValueSubmit, ResponseImportRow
+from app.services.ingest import ingest_responses
+from app.services.submit_buffer import submission_buffer
+from app.services.validation import compile_survey_plan
+from benchmarks._fixtures import create_survey, create_user, drop_owner_data, load_questions, random_answers
+
+
+async def submit_response_per_row(
+    session: AsyncSession,
+    survey_id: UUID,
+    user_id: Optional[UUID],
+    answers: List[AnswerValueSubmit],
+    session_id: Optional[str] = None,
+) -> Response:
+    # The submit path before multi-row inserts: one flush per response and per answer.
+    response = Response(survey_id=survey_id, user_id=user_id, session_id=session_id)
+    session.add(response)
+    await session.flush()
+    for answer in answers:
+        av = AnswerValue(
+            response_id=response.id,
+            question_id=answer.question_id,
+            value_text=answer.value_text,
+            value_number=answer.value_number,
+        )
+        session.add(av)
+        await session.flush()
+        for opt_id in answer.option_ids or []:
+            session.add(AnswerOption(answer_value_id=av.id, option_id=opt_id))
+    await session.commit()
+    return response
+
+
+async def submit_response_buffered(
+    session: AsyncSession,
+    survey_id: UUID,
+    user_id: Optional[UUID],
+    answers: List[AnswerValueSubmit],
+    session_id: Optional[str] = None,
+) -> Response:
+    submission = ResponseSubmission(survey_id=survey_id, answers=answers, user_id=user_id, session_id=session_id)
+    return await submission_buffer.submit(submission)
+
+
+PATHS = {
+    "per-row": submit_response_per_row,
+    "bulk": submit_response,
+    "buffered": submit_response_buffered,
+}
+
+
+async def _worker(path, survey_id: UUID, answer_sets: list, offset: int, step: int, prefix: str) -> None:
+    async with async_session_maker() as session:
+        for i in range(offset, len(answer_sets), step):
+            await path(session, survey_id, None, answer_sets[i], session_id=f"{prefix}-{i}")
+
+
+async def run(questions: int, responses: int, concurrency: int) -> int:
+    statements = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    submission_buffer.start()
+    async with async_session_maker() as session:
+        owner = await create_user(session)
+    try:
+        print(f"{questions} questions, {responses} responses, {concurrency} concurrent sessions")
+        # Unlike the per-row path, bulk and buffered also maintain the analytics counters.
+        print(f"{'path':>8} {'responses/s':>12} {'statements/response':>20}")
+        for name, path in PATHS.items():
+            async with async_session_maker() as session:
+                survey = await create_survey(session, owner.id, questions)
+                survey_questions = await load_questions(session, survey.id)
+            answer_sets = [random_answers(survey_questions) for _ in range(responses)]
+            statements = 0
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(_worker(path, survey.id, answer_sets, i, concurrency, name) for i in range(concurrency))
+            )
+            elapsed = time.perf_counter() - started
+            print(f"{name:>8} {responses / elapsed:>12.1f} {statements / responses:>20.1f}")
+
+        async with async_session_maker() as session:
+            survey = await create_survey(session, owner.id, questions)
+            survey_questions = await load_questions(session, survey.id)
+            plan = await compile_survey_plan(session, survey.id)
+            rows = [(i, ResponseImportRow(answers=random_answers(survey_questions))) for i in range(responses)]
+            started = time.perf_counter()
+            await ingest_responses(session, plan, rows)
+            elapsed = time.perf_counter() - started
+            # COPY runs on the raw asyncpg connection, which the statement listener does not see.
+            print(f"{'copy':>8} {responses / elapsed:>12.1f} {'-':>20}")
+    finally:
+        await submission_buffer.stop()
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+        async with async_session_maker() as session:
+            await drop_owner_data(session, owner.id)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.submit_throughput",
+        description="compare submission throughput of the per-row, multi-row, group-commit and COPY insert paths",
+    )
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--responses", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args.questions, args.responses, args.concurrency))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
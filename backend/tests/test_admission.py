@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+
+
+SUBMIT_TIMEOUT_SECONDS = 0.2
+
+
+async def _call(middleware, method: str, path: str) -> tuple[int, dict, float]:
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    started = time.perf_counter()
+    await middleware({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    elapsed = time.perf_counter() - started
+    start = messages[0]
+    return start["status"], dict(start["headers"]), elapsed
+
+
+async def _run(admission):
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if admission.classify(scope["method"], scope["path"]) == "submit":
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = admission.AdmissionMiddleware(app)
+    submit = "/api/v1/surveys/00000000-0000-0000-0000-000000000000/responses"
+    blocked = [asyncio.create_task(_call(middleware, "POST", submit)) for _ in range(2)]
+    while admission.limiters["submit"].active < 2:
+        await asyncio.sleep(0)
+
+    shed, login, survey = await asyncio.gather(
+        _call(middleware, "POST", submit),
+        _call(middleware, "POST", "/api/v1/auth/login"),
+        _call(middleware, "GET", "/api/v1/surveys/00000000-0000-0000-0000-000000000000"),
+    )
+    release.set()
+    held = await asyncio.gather(*blocked)
+    return shed, login, survey, held
+
+
+def test_saturated_submit_class_sheds_without_blocking_other_classes(monkeypatch):
+    if not os.environ.get("DATABASE_URL"):
+        # Only the settings object needs it; no connection is made.
+        monkeypatch.setenv("DATABASE_URL", "postgresql+asyncpg://localhost/unused")
+    from app.core import admission
+
+    monkeypatch.setattr(admission.settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setitem(
+        admission.limiters, "submit", admission.AdmissionLimiter("test.submit", 2, 8, SUBMIT_TIMEOUT_SECONDS)
+    )
+    monkeypatch.setitem(admission.limiters, "auth", admission.AdmissionLimiter("test.auth", 1, 0, 1.0))
+    monkeypatch.setitem(admission.limiters, "public", admission.AdmissionLimiter("test.public", 1, 0, 1.0))
+
+    (shed_status, shed_headers, shed_elapsed), login, survey, held = asyncio.run(_run(admission))
+
+    assert shed_status == 503
+    assert shed_headers[b"retry-after"] == b"1"
+    assert shed_elapsed < SUBMIT_TIMEOUT_SECONDS + 0.5
+    assert login[0] == 200
+    assert survey[0] == 200
+    assert login[2] < SUBMIT_TIMEOUT_SECONDS
+    assert survey[2] < SUBMIT_TIMEOUT_SECONDS
+    assert [status for status, _, _ in held] == [200, 200]
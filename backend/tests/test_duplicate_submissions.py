@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+import pytest
+
+
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("needs a migrated Postgres database in DATABASE_URL", allow_module_level=True)
+
+from sqlalchemy import func, select
+
+from app.crud import submit_response
+from app.db import async_session_maker, engine
+from app.models import Response, SurveyCounter
+from benchmarks._fixtures import create_survey, create_user, drop_owner_data, load_questions, random_answers
+
+
+PARALLEL_SUBMISSIONS = 20
+
+
+async def _submit_in_parallel(survey_id, answers, user_id=None, session_id=None) -> list:
+    async def submit():
+        async with async_session_maker() as session:
+            return await submit_response(session, survey_id, user_id, answers, session_id=session_id)
+
+    return await asyncio.gather(*(submit() for _ in range(PARALLEL_SUBMISSIONS)))
+
+
+async def _run(respondent: str) -> tuple[list, int, int]:
+    async with async_session_maker() as session:
+        owner = await create_user(session)
+    try:
+        async with async_session_maker() as session:
+            survey = await create_survey(session, owner.id, 8)
+            answers = random_answers(await load_questions(session, survey.id))
+        if respondent == "user":
+            results = await _submit_in_parallel(survey.id, answers, user_id=owner.id)
+        else:
+            results = await _submit_in_parallel(survey.id, answers, session_id="duplicate-session")
+        async with async_session_maker() as session:
+            stored = (
+                await session.execute(select(func.count(Response.id)).where(Response.survey_id == survey.id))
+            ).scalar_one()
+            counted = (
+                await session.execute(
+                    select(SurveyCounter.response_count).where(SurveyCounter.survey_id == survey.id)
+                )
+            ).scalar_one()
+    finally:
+        async with async_session_maker() as session:
+            await drop_owner_data(session, owner.id)
+        await engine.dispose()
+    return results, stored, counted
+
+
+@pytest.mark.parametrize("respondent", ["user", "session"])
+def test_parallel_duplicate_submissions_store_one_response(respondent):
+    results, stored, counted = asyncio.run(_run(respondent))
+
+    assert len([r for r in results if r is not None]) == 1
+    assert stored == 1
+    assert counted == 1
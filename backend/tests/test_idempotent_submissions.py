@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import pytest
+
+
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("needs a migrated Postgres database in DATABASE_URL", allow_module_level=True)
+
+from fastapi import Request, Response as FastAPIResponse
+from sqlalchemy import func, select
+
+from app.api.v1.responses import submit_survey_response
+from app.db import async_session_maker, engine
+from app.models import Response
+from app.schemas import SubmitResponsePayload
+from benchmarks._fixtures import create_survey, create_user, drop_owner_data, load_questions, random_answers
+
+
+def _request_without_cookie() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "headers": [(b"user-agent", b"retrying-client")],
+            "client": ("203.0.113.7", 40000),
+        }
+    )
+
+
+async def _submit(survey_id, payload, key):
+    response = FastAPIResponse()
+    async with async_session_maker() as session:
+        result = await submit_survey_response(
+            survey_id,
+            payload,
+            _request_without_cookie(),
+            response,
+            idempotency_key=key,
+            session=session,
+            current_user=None,
+        )
+    return result, response
+
+
+async def _run():
+    async with async_session_maker() as session:
+        owner = await create_user(session)
+    try:
+        async with async_session_maker() as session:
+            survey = await create_survey(session, owner.id, 8)
+            payload = SubmitResponsePayload(answers=random_answers(await load_questions(session, survey.id)))
+        first, first_response = await _submit(survey.id, payload, "retry-without-cookie")
+        # The client never saw the first reply, so it retries without the session cookie.
+        second, second_response = await _submit(survey.id, payload, "retry-without-cookie")
+        async with async_session_maker() as session:
+            stored = (
+                await session.execute(select(func.count(Response.id)).where(Response.survey_id == survey.id))
+            ).scalar_one()
+    finally:
+        async with async_session_maker() as session:
+            await drop_owner_data(session, owner.id)
+        await engine.dispose()
+    return first, first_response, second, second_response, stored
+
+
+def test_retry_without_session_cookie_replays_redacted_response():
+    first, first_response, second, second_response, stored = asyncio.run(_run())
+
+    assert stored == 1
+    assert second.id == first.id
+    assert first.meta is not None
+    assert second.meta is None
+    assert "idempotent-replayed" not in first_response.headers
+    assert second_response.headers["idempotent-replayed"] == "true"
@@ -61,6 +61,20 @@ export const useAuthStore = defineStore('auth', {
         window.localStorage.removeItem(STORAGE_KEY)
       }
     },
+    async logout() {
+      const refreshToken = this.refreshToken
+      this.clear()
+      if (!refreshToken) return
+      const config = useRuntimeConfig()
+      try {
+        await $fetch(`${config.public.apiBase}/api/v1/auth/logout`, {
+          method: 'POST',
+          body: { refresh_token: refreshToken },
+        })
+      } catch {
+        // Локальный выход уже выполнен; отзыв на сервере не критичен
+      }
+    },
     async login(email: string, password: string) {
       const config = useRuntimeConfig()
       this.loading = true
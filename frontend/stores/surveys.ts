@@ -27,27 +27,55 @@ interface Survey {
   owner_id: string
   settings?: Record<string, any> | null
   questions: Question[]
+  has_responded?: boolean | null
+}
+
+interface SurveySummary {
+  id: string
+  title: string
+  description: string
+  is_published: boolean
+  created_at: string
+  owner_id: string
+  version: number
+  question_count: number
+  response_count: number
+  has_responded?: boolean | null
 }
 
 interface SurveysState {
   items: Survey[]
+  catalog: SurveySummary[]
+  catalogCursor: string | null
   loading: boolean
 }
 
 export const useSurveysStore = defineStore('surveys', {
   state: (): SurveysState => ({
     items: [],
+    catalog: [],
+    catalogCursor: null,
     loading: false,
   }),
   actions: {
-    async fetchPublicSurveys() {
+    async fetchPublicSurveys(accessToken?: string | null, more = false) {
       const config = useRuntimeConfig()
       this.loading = true
       try {
-        const data = await $fetch<Survey[]>(`${config.public.apiBase}/api/v1/surveys`, {
-          query: { published: true },
-        })
-        this.items = data
+        const page = await $fetch<{ items: SurveySummary[]; next_cursor: string | null }>(
+          `${config.public.apiBase}/api/v1/surveys/summary`,
+          {
+            query: {
+              published: true,
+              include_responded: true,
+              cursor: more ? this.catalogCursor ?? undefined : undefined,
+            },
+            headers: accessToken ? { Authorization: `Bearer ${accessToken}` } : undefined,
+            credentials: 'include',
+          }
+        )
+        this.catalog = more ? [...this.catalog, ...page.items] : page.items
+        this.catalogCursor = page.next_cursor
       } finally {
         this.loading = false
       }
@@ -111,6 +139,10 @@ export const useSurveysStore = defineStore('surveys', {
       })
       return survey
     },
+    async getPublishedSurvey(id: string) {
+      const config = useRuntimeConfig()
+      return await $fetch<Survey>(`${config.public.apiBase}/api/v1/surveys/${id}/published`)
+    },
     async updateSurvey(id: string, payload: Partial<Pick<Survey, 'title' | 'description' | 'settings' | 'is_published'>>, accessToken: string) {
       const config = useRuntimeConfig()
       const survey = await $fetch<Survey>(`${config.public.apiBase}/api/v1/surveys/${id}`, {